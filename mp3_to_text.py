@@ -7,64 +7,80 @@ MP3转文字工具
 """
 
 import os
+import io
 import argparse
 import speech_recognition as sr
 from pydub import AudioSegment
-import tempfile
+import struct
+import wave
 import json
 import time
+import hashlib
 import logging
 import subprocess
+import importlib.util
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from aip import AipSpeech
 import threading
+import concurrent.futures
+from collections import deque
 
 # 任务控制器类，用于控制转换过程的暂停和停止
+class TaskStopped(Exception):
+    """任务被用户停止时由TaskController.checkpoint抛出"""
+
+class RecognitionError(Exception):
+    """语音识别失败（服务错误、未配置密钥、无法识别音频等）时由各识别函数抛出"""
+
 class TaskController:
     def __init__(self):
-        self._paused = False
-        self._stop_requested = False
-        self._lock = threading.Lock()
+        # 未暂停时事件处于置位状态，暂停时清除，等待方阻塞在事件上而不是轮询
+        self._unpaused = threading.Event()
+        self._unpaused.set()
+        self._stop = threading.Event()
     
     def pause(self):
         """暂停任务"""
-        with self._lock:
-            self._paused = True
+        self._unpaused.clear()
     
     def resume(self):
         """恢复任务"""
-        with self._lock:
-            self._paused = False
+        self._unpaused.set()
     
     def stop(self):
         """请求停止任务"""
-        with self._lock:
-            self._stop_requested = True
+        self._stop.set()
+        self._unpaused.set()  # 唤醒处于暂停等待中的线程
     
     def is_paused(self):
         """检查是否处于暂停状态"""
-        with self._lock:
-            return self._paused
+        return not self._unpaused.is_set()
     
     def is_stop_requested(self):
         """检查是否请求停止"""
-        with self._lock:
-            return self._stop_requested
+        return self._stop.is_set()
     
     def reset(self):
         """重置控制器状态"""
-        with self._lock:
-            self._paused = False
-            self._stop_requested = False
+        self._stop.clear()
+        self._unpaused.set()
     
     def wait_if_paused(self):
-        """如果处于暂停状态，则等待直到恢复"""
-        while True:
-            with self._lock:
-                if not self._paused:
-                    return
-                if self._stop_requested:
-                    return
-            time.sleep(0.1)  # 短暂休眠避免CPU占用过高
+        """如果处于暂停状态，则等待直到恢复或请求停止"""
+        self._unpaused.wait()
+    
+    def checkpoint(self, stage=""):
+        """
+        任务检查点：暂停时在此等待，请求停止时抛出TaskStopped
+        
+        Args:
+            stage: 当前阶段的描述，作为异常信息
+        """
+        self._unpaused.wait()
+        if self._stop.is_set():
+            raise TaskStopped(stage)
 
 # 配置日志
 logging.basicConfig(
@@ -74,8 +90,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger("MP3ToText")
 
-# 为第三方库配置日志
-logging.getLogger("urllib3").setLevel(logging.DEBUG)
+# 为第三方库配置日志（连接池日志在并发请求时非常频繁，默认只显示警告）
+logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 # 百度语音识别API配置
 # 请在此处替换为您的百度API密钥
@@ -83,102 +99,374 @@ BAIDU_APP_ID = ''
 BAIDU_API_KEY = ''
 BAIDU_SECRET_KEY = ''
 
-def convert_mp3_to_wav(mp3_path):
+# 共享的百度客户端（所有请求和分段复用同一个客户端及其连接池）
+_BAIDU_CLIENT = None
+_BAIDU_CLIENT_KEY = None
+_BAIDU_CLIENT_LOCK = threading.Lock()
+
+# 百度短语音识别单次请求的音频最长60秒，超过时分段并发识别
+BAIDU_MAX_DURATION_MS = 60000
+# 16kHz、单声道、16位WAV时对应的最大数据量（含44字节文件头）
+BAIDU_MAX_WAV_BYTES = BAIDU_MAX_DURATION_MS * 16000 * 2 // 1000 + 44
+
+# 分段识别的最大并发数（百度API有QPS限制，不宜设置过大）
+BAIDU_MAX_WORKERS = 4
+
+# 每秒最多发送的百度识别请求数（所有线程共享）
+BAIDU_MAX_QPS = 5
+_BAIDU_REQUEST_TIMES = deque()
+_BAIDU_RATE_LOCK = threading.Lock()
+
+# 共享的Google语音识别器（识别调用本身不修改其状态，可跨调用复用）
+_GOOGLE_RECOGNIZER = sr.Recognizer()
+_GOOGLE_RECOGNIZER.energy_threshold = 300  # 将语音识别的灵敏度调整到合适值
+
+# 百度语音识别支持的语言及对应的dev_pid
+_LANG_DEV_PID = {
+    "zh": 1537,   # 普通话(支持简繁)
+    "en": 1737,   # 英语
+    "yue": 1637,  # 粤语
+}
+
+# 识别后端及其显示名称
+BACKEND_NAMES = {"baidu": "百度", "google": "Google", "whisper": "本地Whisper"}
+
+# 本地Whisper模型配置（需要安装可选依赖faster-whisper）
+WHISPER_MODEL_SIZE = "small"
+_WHISPER_MODEL = None
+_WHISPER_MODEL_LOCK = threading.Lock()
+
+# 百度access token的磁盘缓存（token有效期约30天，避免每次启动都重新鉴权）
+BAIDU_TOKEN_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "mp3_to_text", "baidu_token.json")
+# token剩余有效期低于该值(秒)时提前刷新
+BAIDU_TOKEN_REFRESH_MARGIN = 3600
+_BAIDU_TOKEN_LOCK = threading.Lock()
+
+# ffmpeg是否链接了libsoxr（首次解码时检测一次），可用时改用soxr重采样
+_FFMPEG_HAS_SOXR = None
+
+class CachedTokenAipSpeech(AipSpeech):
+    """
+    将access token缓存到磁盘的AipSpeech客户端
+    """
+    def _token_cache_key(self):
+        """用密钥的摘要区分不同账号的缓存，避免把密钥明文写入缓存文件"""
+        return hashlib.sha256(f"{self._apiKey}:{self._secretKey}".encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _token_valid(auth_obj):
+        """检查token是否在刷新阈值之外仍然有效"""
+        expires_at = auth_obj.get("time", 0) + int(auth_obj.get("expires_in", 0))
+        return "access_token" in auth_obj and expires_at - time.time() > BAIDU_TOKEN_REFRESH_MARGIN
+    
+    def _load_cached_token(self):
+        """从缓存文件读取token，无效或不匹配时返回None"""
+        try:
+            with open(BAIDU_TOKEN_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("key") != self._token_cache_key():
+            return None
+        auth_obj = cached.get("auth", {})
+        return auth_obj if self._token_valid(auth_obj) else None
+    
+    def _save_cached_token(self, auth_obj):
+        """原子地写入token缓存文件"""
+        try:
+            os.makedirs(os.path.dirname(BAIDU_TOKEN_CACHE_FILE), exist_ok=True)
+            temp_path = BAIDU_TOKEN_CACHE_FILE + ".tmp"
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"key": self._token_cache_key(), "auth": auth_obj}, f)
+            os.replace(temp_path, BAIDU_TOKEN_CACHE_FILE)
+        except OSError as e:
+            logger.warning("保存百度token缓存失败: %s", e)
+    
+    def _auth(self, refresh=False):
+        # 并发的分段请求共享同一个客户端，加锁避免同时刷新token
+        with _BAIDU_TOKEN_LOCK:
+            if not refresh:
+                if self._token_valid(self._authObj):
+                    return self._authObj
+                
+                cached = self._load_cached_token()
+                if cached:
+                    logger.debug("使用缓存的百度access token")
+                    self._isCloudUser = not self._isPermission(cached)
+                    self._authObj = cached
+                    return cached
+            
+            logger.debug("请求新的百度access token")
+            auth_obj = super()._auth(refresh=True)
+            if "access_token" in auth_obj:
+                self._save_cached_token(auth_obj)
+            return auth_obj
+
+def _create_http_session():
+    """
+    创建带连接池和重试策略的HTTP会话，保持长连接以复用TLS握手
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def _get_baidu_client():
+    """
+    获取共享的百度AipSpeech客户端，API密钥变化时自动重建
+    """
+    global _BAIDU_CLIENT, _BAIDU_CLIENT_KEY
+    key = (BAIDU_APP_ID, BAIDU_API_KEY, BAIDU_SECRET_KEY)
+    with _BAIDU_CLIENT_LOCK:
+        if _BAIDU_CLIENT is None or _BAIDU_CLIENT_KEY != key:
+            logger.debug("创建百度AipSpeech客户端，APP_ID: %s***", BAIDU_APP_ID[:4])
+            client = CachedTokenAipSpeech(*key)
+            # aip的识别请求通过client.s发送（默认Session没有重试），获取token等请求通过_AipBase__client
+            # （旧版本SDK中识别请求也走这里），两者都替换为同一个带连接池和重试的Session
+            session = _create_http_session()
+            client.s = session
+            client._AipBase__client = session
+            _BAIDU_CLIENT = client
+            _BAIDU_CLIENT_KEY = key
+        return _BAIDU_CLIENT
+
+def _wait_for_baidu_rate_limit():
+    """
+    等待直到可以发送下一个百度识别请求，保证最近一秒内的请求数不超过BAIDU_MAX_QPS
+    """
+    while True:
+        with _BAIDU_RATE_LOCK:
+            now = time.monotonic()
+            while _BAIDU_REQUEST_TIMES and now - _BAIDU_REQUEST_TIMES[0] >= 1.0:
+                _BAIDU_REQUEST_TIMES.popleft()
+            if len(_BAIDU_REQUEST_TIMES) < BAIDU_MAX_QPS:
+                _BAIDU_REQUEST_TIMES.append(now)
+                return
+            delay = 1.0 - (now - _BAIDU_REQUEST_TIMES[0])
+        logger.debug("百度API请求达到QPS上限，等待 %.2f 秒", delay)
+        time.sleep(delay)
+
+def prewarm_baidu_client():
     """
-    将MP3文件转换为WAV格式（因为语音识别库需要WAV格式）
+    预先创建共享的百度客户端并取得access token（供界面启动时在后台线程调用），
+    首次识别时不必再等待客户端初始化和鉴权
     """
-    print(f"正在转换 {mp3_path} 为WAV格式...")
+    if not BAIDU_APP_ID or not BAIDU_API_KEY or not BAIDU_SECRET_KEY:
+        return
     try:
-        sound = AudioSegment.from_mp3(mp3_path)
-        
-        # 创建临时文件
-        fd, temp_path = tempfile.mkstemp(suffix='.wav')
-        os.close(fd)
-        
-        # 打印ffmpeg命令
-        logger.debug(f"subprocess.call(['ffmpeg', '-y', '-f', 'mp3', '-i', '{mp3_path}', '-acodec', 'pcm_s16le', '-vn', '-f', 'wav', '-'])")
-        
-        sound.export(temp_path, format="wav")
-        return temp_path
+        _get_baidu_client()._auth()
+        logger.debug("百度客户端预热完成")
     except Exception as e:
-        logger.error(f"转换MP3到WAV时出错: {str(e)}")
+        logger.warning("预先获取百度access token失败: %s", e)
+
+def close_baidu_client():
+    """
+    关闭共享百度客户端的HTTP连接池（程序退出时调用），之后的请求会重新创建客户端
+    """
+    global _BAIDU_CLIENT, _BAIDU_CLIENT_KEY
+    with _BAIDU_CLIENT_LOCK:
+        if _BAIDU_CLIENT is not None:
+            logger.debug("关闭百度AipSpeech客户端的HTTP连接")
+            # 识别请求使用client.s，token请求使用_AipBase__client，通常为同一个Session，只关闭一次
+            sessions = {id(session): session
+                        for session in (getattr(_BAIDU_CLIENT, "s", None),
+                                        getattr(_BAIDU_CLIENT, "_AipBase__client", None))
+                        if hasattr(session, "close")}
+            for session in sessions.values():
+                session.close()
+            _BAIDU_CLIENT = None
+            _BAIDU_CLIENT_KEY = None
+
+def _ffmpeg_has_soxr():
+    """检查ffmpeg是否链接了libsoxr（结果缓存，只检测一次）"""
+    global _FFMPEG_HAS_SOXR
+    if _FFMPEG_HAS_SOXR is None:
+        try:
+            output = subprocess.run([AudioSegment.converter, '-hide_banner', '-version'],
+                                    capture_output=True, check=False).stdout
+            _FFMPEG_HAS_SOXR = b'--enable-libsoxr' in output
+        except OSError:
+            _FFMPEG_HAS_SOXR = False
+        logger.debug("ffmpeg soxr重采样: %s", "可用" if _FFMPEG_HAS_SOXR else "不可用")
+    return _FFMPEG_HAS_SOXR
+
+def decode_mp3_to_pcm16k(mp3_path):
+    """
+    使用ffmpeg将MP3直接解码为16kHz、单声道、16位的原始PCM数据
+    解码结果从ffmpeg的标准输出读取到内存，不经过临时文件
+    """
+    print(f"正在解码 {mp3_path} ...")
+    cmd = [AudioSegment.converter, '-nostdin', '-v', 'error', '-threads', '0', '-i', mp3_path,
+           '-vn', '-acodec', 'pcm_s16le', '-f', 's16le', '-ar', '16000', '-ac', '1']
+    # 链接了libsoxr时使用更快的soxr重采样，否则保留ffmpeg默认的swr
+    if _ffmpeg_has_soxr():
+        cmd += ['-af', 'aresample=resampler=soxr:precision=20']
+    cmd.append('-')
+    try:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("subprocess.Popen(%s)", " ".join(cmd))
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        pcm_data, stderr_data = proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg解码失败: {stderr_data.decode('utf-8', errors='replace').strip()}")
+        logger.debug("解码完成，PCM数据大小: %.2f MB", len(pcm_data)/1024/1024)
+        return pcm_data
+    except Exception as e:
+        logger.error("解码MP3时出错: %s", e)
         raise
 
-def transcribe_audio_google(audio_path, language="zh-CN"):
+def decode_mp3(mp3_path):
     """
-    使用Google语音识别服务将音频文件转换为文字
+    将MP3解码为16kHz、单声道、16位的AudioSegment
+    解码结果可直接传给transcribe_audio，整个识别流程只解码一次
     """
-    recognizer = sr.Recognizer()
+    pcm_data = decode_mp3_to_pcm16k(mp3_path)
+    return AudioSegment(data=pcm_data, sample_width=2, frame_rate=16000, channels=1)
+
+def split_wav(wav_data):
+    """
+    从内存中的WAV数据取出PCM帧及其参数
     
-    # 将语音识别的灵敏度调整到合适值
-    recognizer.energy_threshold = 300
+    Returns:
+        (pcm_data, frame_rate, sample_width)
+    """
+    # 标准44字节文件头直接解析，其他WAV交给wave模块
+    if wav_data[:4] == b'RIFF' and wav_data[12:16] == b'fmt ' and wav_data[36:40] == b'data':
+        frame_rate, = struct.unpack_from('<I', wav_data, 24)
+        bits_per_sample, = struct.unpack_from('<H', wav_data, 34)
+        return wav_data[44:], frame_rate, bits_per_sample // 8
+    with wave.open(io.BytesIO(wav_data), 'rb') as wav_file:
+        return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate(), wav_file.getsampwidth()
+
+def transcribe_audio_google(audio, language="zh-CN"):
+    """
+    使用Google语音识别服务将音频转换为文字
     
-    # 加载音频文件
-    with sr.AudioFile(audio_path) as source:
-        print("正在分析音频文件...")
-        logger.debug("调用speech_recognition分析音频文件")
-        audio = recognizer.record(source)
+    Args:
+        audio: 已解码的AudioSegment、WAV音频文件路径，或内存中的WAV数据(bytes)
+        language: 语言代码
+    """
+    recognizer = _GOOGLE_RECOGNIZER
+    
+    if isinstance(audio, AudioSegment):
+        # 已解码的音频直接构造AudioData，无需再通过AudioFile读取一遍
+        audio = sr.AudioData(audio.raw_data, audio.frame_rate, audio.sample_width)
+    elif isinstance(audio, (bytes, bytearray)):
+        pcm_data, frame_rate, sample_width = split_wav(audio)
+        audio = sr.AudioData(pcm_data, frame_rate, sample_width)
+    else:
+        # 加载音频文件
+        with sr.AudioFile(audio) as source:
+            print("正在分析音频文件...")
+            logger.debug("调用speech_recognition分析音频文件")
+            audio = recognizer.record(source)
     
     print("正在使用Google API转换为文字...")
     try:
         # 使用Google语音识别服务
-        logger.debug(f"发送请求到Google语音识别服务，语言代码: {language}")
+        logger.debug("发送请求到Google语音识别服务，语言代码: %s", language)
         start_time = time.time()
         text = recognizer.recognize_google(audio, language=language)
         elapsed_time = time.time() - start_time
-        logger.debug(f"Google API响应时间: {elapsed_time:.2f}秒")
+        logger.debug("Google API响应时间: %.2f秒", elapsed_time)
         return text
-    except sr.UnknownValueError:
+    except sr.UnknownValueError as e:
         logger.warning("Google语音识别服务无法识别音频内容")
-        return "无法识别音频"
+        raise RecognitionError("无法识别音频") from e
     except sr.RequestError as e:
-        logger.error(f"无法访问Google语音识别服务: {str(e)}")
-        return f"Google语音识别服务错误: {e}"
+        logger.error("无法访问Google语音识别服务: %s", e)
+        raise RecognitionError(f"Google语音识别服务错误: {e}") from e
 
-def transcribe_audio_baidu(audio_path, language="zh", progress_callback=None, task_controller=None):
+def baidu_asr_options(language):
+    """
+    根据语言代码生成百度识别请求参数，不支持的语言回退到普通话
     """
-    使用百度语音识别API将音频文件转换为文字
+    base_language = language.split("-")[0].lower()
+    dev_pid = _LANG_DEV_PID.get(base_language)
+    if dev_pid is None:
+        logger.warning("百度语音识别不支持语言 %s，使用普通话模型识别", language)
+        dev_pid = _LANG_DEV_PID["zh"]
+    return {"dev_pid": dev_pid}
+
+def transcribe_audio_baidu(audio, language="zh", progress_callback=None, task_controller=None,
+                           chunk_text_callback=None, options=None, failed_segments=None):
+    """
+    使用百度语音识别API将音频转换为文字
+    
+    Args:
+        audio: 已解码的AudioSegment、WAV音频文件路径，或内存中的WAV数据(bytes)
+        language: 语言代码
+        progress_callback: 进度回调函数
+        task_controller: 任务控制器，用于控制暂停和停止
+        chunk_text_callback: 分段文本回调函数，每完成一段按顺序调用，接收两个参数(index, text)
+        options: 百度识别请求参数，未指定时根据language生成
+        failed_segments: 可选的列表，识别失败的分段序号（从0开始）追加到其中；
+            有分段失败时返回其余分段的文本，调用方据此判断结果是否完整
     """
     if not BAIDU_APP_ID or not BAIDU_API_KEY or not BAIDU_SECRET_KEY:
         print("错误: 未配置百度语音识别API密钥")
         logger.error("未配置百度语音识别API密钥")
-        return "错误: 未配置百度语音识别API密钥，请在脚本中配置APP_ID、API_KEY和SECRET_KEY"
+        raise RecognitionError("未配置百度语音识别API密钥，请在脚本中配置APP_ID、API_KEY和SECRET_KEY")
 
-    # 创建AipSpeech客户端
-    logger.debug(f"创建百度AipSpeech客户端，APP_ID: {BAIDU_APP_ID[:4]}***")
-    client = AipSpeech(BAIDU_APP_ID, BAIDU_API_KEY, BAIDU_SECRET_KEY)
+    # 获取共享的AipSpeech客户端
+    client = _get_baidu_client()
     
-    # 读取音频文件
-    print("正在读取音频文件...")
-    with open(audio_path, 'rb') as fp:
-        audio_data = fp.read()
+    # 先取得音频大小（16kHz单声道16位WAV的大小与时长对应），超限时直接交给分段处理，不必先把整个文件读入内存
+    if isinstance(audio, AudioSegment):
+        file_size = len(audio.raw_data) + 44
+    elif isinstance(audio, (bytes, bytearray)):
+        file_size = len(audio)
+    else:
+        file_size = os.path.getsize(audio)
     
     # 日志记录文件大小
-    file_size = len(audio_data)
-    logger.debug(f"音频文件大小: {file_size/1024/1024:.2f} MB")
-    
-    # 限制文件大小（百度API限制10MB以内）
-    if file_size > 10 * 1024 * 1024:
-        print("警告: 文件大小超过10MB，尝试分段识别...")
-        logger.warning(f"文件大小({file_size/1024/1024:.2f}MB)超过百度API限制(10MB)，进行分段处理")
-        return transcribe_large_audio_baidu(audio_path, language, progress_callback, task_controller)
-    
-    # 设置参数
-    options = {}
-    
-    # 语言设置
-    if language.startswith("zh"):
-        options["dev_pid"] = 1537  # 普通话(支持简繁)
-    elif language.startswith("en"):
-        options["dev_pid"] = 1737  # 英语
-    elif language.startswith("ja"):
-        options["dev_pid"] = 1737  # 日语
-    elif language.startswith("ko"):
-        options["dev_pid"] = 1737  # 韩语
-    # 更多语言支持可以参考百度文档
+    logger.debug("音频文件大小: %.2f MB", file_size/1024/1024)
+    
+    # 限制音频时长（百度API单次请求限制60秒以内），超过时分段并发识别
+    if file_size > BAIDU_MAX_WAV_BYTES:
+        print("音频超过60秒，分段识别...")
+        logger.info("音频(%.2fMB)超过百度API单次识别时长限制(%d秒)，进行分段处理",
+                    file_size/1024/1024, BAIDU_MAX_DURATION_MS // 1000)
+        return transcribe_large_audio_baidu(audio, language, progress_callback, task_controller,
+                                            chunk_text_callback, options, failed_segments)
     
+    # 读取音频数据：已解码的音频直接以原始PCM上传，不再封装WAV文件头；内存中的WAV数据直接使用
+    if isinstance(audio, AudioSegment):
+        audio_data = audio.set_frame_rate(16000).set_channels(1).set_sample_width(2).raw_data
+        audio_format = 'pcm'
+    elif isinstance(audio, (bytes, bytearray)):
+        audio_data = audio
+        audio_format = 'wav'
+    else:
+        print("正在读取音频文件...")
+        with open(audio, 'rb') as fp:
+            audio_data = fp.read()
+        audio_format = 'wav'
+    
+    # 设置参数（分段识别时由调用方统一生成后传入）
+    if options is None:
+        options = baidu_asr_options(language)
+    
+    return _baidu_recognize(client, audio_data, audio_format, options)
+
+def _baidu_recognize(client, audio_data, audio_format, options):
+    """
+    发送一次百度语音识别请求（音频不超过60秒）并解析结果
+    
+    Args:
+        client: AipSpeech客户端
+        audio_data: 音频数据，16kHz单声道16位的原始PCM或WAV
+        audio_format: 音频格式，'pcm'或'wav'
+        options: 百度识别请求参数
+    """
     # 日志记录请求参数
-    logger.debug(f"百度API请求参数: format=wav, rate=16000, dev_pid={options.get('dev_pid', 1537)}")
+    logger.debug("百度API请求参数: format=%s, rate=16000, dev_pid=%s", audio_format, options["dev_pid"])
     
     # 发送识别请求
     print("正在使用百度API转换为文字...")
@@ -186,141 +474,449 @@ def transcribe_audio_baidu(audio_path, language="zh", progress_callback=None, ta
     logger.debug("发送请求到百度语音识别服务")
     
     try:
-        result = client.asr(audio_data, 'wav', 16000, options)
-        elapsed_time = time.time() - start_time
-        print(f"请求耗时: {elapsed_time:.2f}秒")
+        _wait_for_baidu_rate_limit()
+        result = client.asr(audio_data, audio_format, 16000, options)
+    except Exception as e:
+        logger.error("调用百度API时发生异常: %s", e)
+        raise RecognitionError(f"百度语音识别服务异常: {str(e)}") from e
+    elapsed_time = time.time() - start_time
+    print(f"请求耗时: {elapsed_time:.2f}秒")
+    
+    # 日志记录响应详情
+    logger.debug("百度API响应耗时: %.2f秒", elapsed_time)
+    logger.debug("百度API响应状态码: %s", result.get('err_no', -1))
+    
+    # 解析结果
+    if result.get("err_no") != 0:
+        error_msg = f"百度语音识别服务错误: {result.get('err_msg')} (错误码: {result.get('err_no')})"
+        logger.error(error_msg)
+        raise RecognitionError(error_msg)
+    text_result = "\n".join(result["result"])
+    logger.debug("识别成功，识别结果长度: %d 字符", len(text_result))
+    return text_result
+
+def split_fixed(pcm_data, chunk_length_ms=60000, frame_rate=16000, sample_width=2):
+    """
+    按固定时长切分PCM数据
+    
+    Returns:
+        分段列表，每项为(起始字节, 结束字节)
+    """
+    chunk_bytes = chunk_length_ms * frame_rate * sample_width // 1000
+    chunks_number = max(1, -(-len(pcm_data) // chunk_bytes))
+    return [(i * chunk_bytes, min((i + 1) * chunk_bytes, len(pcm_data))) for i in range(chunks_number)]
+
+def _speech_segments(voiced_frames, frame_bytes, bytes_per_ms, min_length_ms, max_length_ms,
+                     pause_ms, silence_break_ms, min_keep_ms=300, merge_limit_ms=BAIDU_MAX_DURATION_MS):
+    """
+    根据逐帧的语音检测结果切分分段，丢弃静音部分
+    
+    分段在时长超过min_length_ms后遇到pause_ms以上的停顿时结束，
+    遇到silence_break_ms以上的长静音时无论长短都结束，最长不超过max_length_ms。
+    不足min_length_ms的分段并入相邻分段（合并后不超过merge_limit_ms，即百度单次识别的时长上限），
+    无法合并且不足min_keep_ms的分段（孤立的咔哒声、呼吸声等）丢弃
+    
+    Returns:
+        分段列表，每项为(起始字节, 结束字节)
+    """
+    min_bytes = min_length_ms * bytes_per_ms
+    max_bytes = max_length_ms * bytes_per_ms
+    pause_bytes = pause_ms * bytes_per_ms
+    silence_break_bytes = silence_break_ms * bytes_per_ms
+    
+    segments = []
+    segment_start = None
+    voiced_end = 0
+    for index, voiced in enumerate(voiced_frames):
+        offset = index * frame_bytes
+        frame_end = offset + frame_bytes
+        if voiced:
+            if segment_start is None:
+                segment_start = offset
+            voiced_end = frame_end
         
-        # 日志记录响应详情
-        logger.debug(f"百度API响应耗时: {elapsed_time:.2f}秒")
-        logger.debug(f"百度API响应状态码: {result.get('err_no', -1)}")
+        if segment_start is None:
+            continue
         
-        # 解析结果
-        if result["err_no"] == 0:
-            text_result = "\n".join(result["result"])
-            logger.debug(f"识别成功，识别结果长度: {len(text_result)} 字符")
-            return text_result
-        else:
-            error_msg = f"百度语音识别服务错误: {result['err_msg']} (错误码: {result['err_no']})"
-            logger.error(error_msg)
-            return error_msg
-    except Exception as e:
-        logger.error(f"调用百度API时发生异常: {str(e)}")
-        return f"百度语音识别服务异常: {str(e)}"
+        silence = frame_end - voiced_end
+        if (frame_end - segment_start >= max_bytes
+                or (silence >= pause_bytes and voiced_end - segment_start >= min_bytes)
+                or silence >= silence_break_bytes):
+            segments.append((segment_start, voiced_end))
+            segment_start = None
+    
+    if segment_start is not None:
+        segments.append((segment_start, voiced_end))
+    return _merge_short_segments(segments, min_bytes, min_keep_ms * bytes_per_ms, merge_limit_ms * bytes_per_ms)
+
+def _merge_short_segments(segments, min_bytes, min_keep_bytes, merge_limit_bytes):
+    """
+    将不足min_bytes的分段与前一个分段合并（合并后的跨度不超过merge_limit_bytes），
+    之后仍不足min_keep_bytes的分段丢弃（只有一个分段时保留）
+    """
+    merged = []
+    for start, end in segments:
+        if merged:
+            prev_start, prev_end = merged[-1]
+            if ((end - start < min_bytes or prev_end - prev_start < min_bytes)
+                    and end - prev_start <= merge_limit_bytes):
+                merged[-1] = (prev_start, end)
+                continue
+        merged.append((start, end))
+    
+    if len(merged) > 1:
+        merged = [(start, end) for start, end in merged if end - start >= min_keep_bytes]
+    return merged
 
-def transcribe_large_audio_baidu(audio_path, language="zh", progress_callback=None, task_controller=None):
+def split_on_speech(pcm_data, frame_rate=16000, min_length_ms=5000, max_length_ms=30000,
+                    pause_ms=300, silence_break_ms=2000, aggressiveness=2):
+    """
+    使用webrtcvad检测语音活动，在语音停顿处切分PCM数据（16位单声道），丢弃静音部分
+    
+    Returns:
+        分段列表，每项为(起始字节, 结束字节)；未安装webrtcvad时返回None
     """
-    处理大型音频文件，分段进行识别
+    try:
+        import webrtcvad
+    except ImportError:
+        logger.debug("未安装webrtcvad，尝试按音量检测静音")
+        return None
+    
+    vad = webrtcvad.Vad(aggressiveness)
+    bytes_per_ms = frame_rate * 2 // 1000
+    frame_bytes = 30 * bytes_per_ms  # webrtcvad支持10/20/30毫秒的帧
+    voiced_frames = (vad.is_speech(pcm_data[offset:offset + frame_bytes], frame_rate)
+                     for offset in range(0, len(pcm_data) - frame_bytes + 1, frame_bytes))
+    segments = _speech_segments(voiced_frames, frame_bytes, bytes_per_ms, min_length_ms, max_length_ms,
+                                pause_ms, silence_break_ms)
+    
+    logger.debug("语音活动检测完成，共%d个语音分段", len(segments))
+    return segments
+
+def split_on_energy(pcm_data, frame_rate=16000, min_length_ms=5000, max_length_ms=30000,
+                    pause_ms=300, silence_break_ms=2000, noise_percentile=10, noise_factor=3.0,
+                    min_threshold=50, max_threshold_factor=4, hangover_ms=300, min_voiced_ratio=0.2,
+                    block_frames=2000):
+    """
+    按每30毫秒帧的音量(RMS)检测静音并在停顿处切分PCM数据（16位单声道），丢弃静音部分
+    
+    未安装webrtcvad时使用，音量计算由numpy按块向量化完成。静音阈值根据文件本身确定：
+    取各帧RMS的noise_percentile分位数作为底噪，高于底噪noise_factor倍的帧视为语音。
+    阈值限制在min_threshold到min_threshold*max_threshold_factor之间，没有真正静音的录音
+    （持续讲话、背景音乐）中底噪取自较轻的语音，上限保证这些语音不会被当作静音切掉；
+    语音帧前后各保留hangover_ms，避免切掉字词开头和结尾的弱音
+    
+    Returns:
+        分段列表，每项为(起始字节, 结束字节)；未安装numpy，或检测到的语音不足音频的min_voiced_ratio
+        （阈值可能不适合该录音）时返回None，由调用方按固定时长切分
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        logger.debug("未安装numpy，使用固定时长分段")
+        return None
+    
+    bytes_per_ms = frame_rate * 2 // 1000
+    frame_bytes = 30 * bytes_per_ms
+    frame_samples = frame_bytes // 2
+    frames_number = len(pcm_data) // frame_bytes
+    if frames_number == 0:
+        return None
+    samples = np.frombuffer(pcm_data, dtype=np.int16, count=frames_number * frame_samples)
+    samples = samples.reshape(frames_number, frame_samples)
+    
+    # 每帧的平方和，按块转换为float64，避免整个文件的副本占用内存
+    energy = np.empty(frames_number)
+    for start in range(0, frames_number, block_frames):
+        block = samples[start:start + block_frames].astype(np.float64)
+        energy[start:start + block_frames] = np.einsum('ij,ij->i', block, block)
+    
+    # 比较平方和，无需逐帧开方
+    noise_floor = np.percentile(energy, noise_percentile)
+    min_energy = float(min_threshold) ** 2 * frame_samples
+    max_energy = min_energy * max_threshold_factor ** 2
+    energy_threshold = min(max(noise_floor * noise_factor ** 2, min_energy), max_energy)
+    voiced = energy >= energy_threshold
+    
+    # 语音帧向前后扩展hangover帧：窗口内有任一语音帧即视为语音（用累加和计算窗口内的语音帧数）
+    hangover = hangover_ms // 30
+    if hangover > 0:
+        counts = np.concatenate(([0], np.cumsum(voiced)))
+        index = np.arange(frames_number)
+        window_end = np.minimum(index + hangover + 1, frames_number)
+        window_start = np.maximum(index - hangover, 0)
+        voiced = counts[window_end] - counts[window_start] > 0
+    voiced_ratio = float(voiced.mean())
+    logger.debug("音量静音检测阈值RMS: %.1f，语音帧占比: %.1f%%",
+                 (energy_threshold / frame_samples) ** 0.5, voiced_ratio * 100)
+    if voiced_ratio < min_voiced_ratio:
+        logger.debug("检测到的语音过少，使用固定时长分段")
+        return None
+    
+    segments = _speech_segments(voiced.tolist(), frame_bytes, bytes_per_ms, min_length_ms, max_length_ms,
+                                pause_ms, silence_break_ms)
+    
+    logger.debug("音量静音检测完成，共%d个语音分段", len(segments))
+    return segments
+
+def _recognize_chunk_baidu(index, chunk, chunks_number, options, task_controller=None):
+    """
+    识别单个音频分段（在线程池中执行）
+    
+    Args:
+        index: 分段序号（从0开始）
+        chunk: 音频片段的原始PCM数据（16kHz、单声道、16位）
+        chunks_number: 分段总数
+        options: 百度识别请求参数
+        task_controller: 任务控制器，用于控制暂停和停止
+    """
+    # 检查是否暂停或请求停止
+    if task_controller:
+        task_controller.wait_if_paused()
+        if task_controller.is_stop_requested():
+            return "处理已被用户停止"
+    
+    print(f"处理分段 {index+1}/{chunks_number}...")
+    logger.debug("开始处理第%d段（共%d段）", index+1, chunks_number)
+    
+    # 分段不超过60秒，原始PCM片段（memoryview）直接上传，无需封装WAV文件头或复制数据
+    logger.debug("对片段 %d 进行语音识别", index+1)
+    return _baidu_recognize(_get_baidu_client(), chunk, 'pcm', options)
+
+def transcribe_large_audio_baidu(audio, language="zh", progress_callback=None, task_controller=None,
+                                 chunk_text_callback=None, options=None, failed_segments=None):
+    """
+    处理大型音频文件，分段并发进行识别
     
     Args:
-        audio_path: 音频文件路径
+        audio: 已解码的AudioSegment、WAV音频文件路径，或内存中的WAV数据(bytes)
         language: 语言代码
         progress_callback: 进度回调函数，接收两个参数(current, total)
         task_controller: 任务控制器，用于控制暂停和停止
+        chunk_text_callback: 分段文本回调函数，每完成一段按顺序调用，接收两个参数(index, text)
+        options: 百度识别请求参数，未指定时根据language生成
+        failed_segments: 可选的列表，识别失败的分段序号（从0开始）追加到其中；
+            有分段失败时返回其余分段的文本，调用方据此判断结果是否完整
     """
+    # 所有分段共用同一份请求参数
+    if options is None:
+        options = baidu_asr_options(language)
+    
     # 加载音频
     try:
-        logger.debug("加载大型音频文件进行分段处理")
-        audio = AudioSegment.from_wav(audio_path)
+        # 已解码的AudioSegment直接使用，避免再解析一遍WAV
+        if not isinstance(audio, AudioSegment):
+            logger.debug("加载大型音频文件进行分段处理")
+            if isinstance(audio, (bytes, bytearray)):
+                audio = io.BytesIO(audio)
+            audio = AudioSegment.from_wav(audio)
         
-        # 分段长度(毫秒) - 约为1分钟
-        chunk_length_ms = 60000
+        # 统一为百度API要求的16kHz、单声道、16位PCM，之后通过memoryview零拷贝切分原始数据
+        audio = audio.set_frame_rate(16000).set_channels(1).set_sample_width(2)
+        raw_data = memoryview(audio.raw_data)
         
-        # 计算分段数量
-        chunks_number = len(audio) // chunk_length_ms + 1
+        # 按语音停顿切分（静音部分直接丢弃），未安装webrtcvad时按音量检测静音，都不可用时按固定时长切分
+        segments = split_on_speech(raw_data)
+        if segments is None:
+            segments = split_on_energy(raw_data)
+        if segments is None:
+            segments = split_fixed(raw_data)
+        chunks_number = len(segments)
         
-        logger.debug(f"音频时长: {len(audio)/1000:.2f}秒，分为{chunks_number}段处理")
+        logger.debug("音频时长: %.2f秒，分为%d段处理", len(audio)/1000, chunks_number)
         print(f"文件已分为{chunks_number}段处理")
         
-        # 存储所有识别结果
-        transcription = []
+        # 全部为静音时无需请求
+        if not segments:
+            logger.info("未检测到语音内容")
+            return ""
+        
+        # 按分段序号预分配结果槽位，各分段不论完成先后都写入自己的位置
+        transcription = [""] * chunks_number
+        finished = [False] * chunks_number
+        failures = []
+        next_to_report = 0
         
-        # 分段处理
-        for i in range(chunks_number):
-            # 检查是否请求停止
-            if task_controller and task_controller.is_stop_requested():
-                logger.info("检测到停止请求，中断处理")
-                print("处理已停止")
-                return "处理已被用户停止"
+        # 报告进度
+        if progress_callback:
+            progress_callback(0, chunks_number)
+        
+        # 分段并发处理，按完成顺序收集结果
+        with concurrent.futures.ThreadPoolExecutor(max_workers=BAIDU_MAX_WORKERS,
+                                                   thread_name_prefix="baidu_asr") as pool:
+            futures = {
+                pool.submit(_recognize_chunk_baidu, i, raw_data[start:end],
+                            chunks_number, options, task_controller): i
+                for i, (start, end) in enumerate(segments)
+            }
             
-            # 检查是否暂停
-            if task_controller:
-                task_controller.wait_if_paused()
-                if task_controller.is_stop_requested():
-                    logger.info("暂停后检测到停止请求，中断处理")
+            for completed, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    chunk_result = future.result()
+                except RecognitionError as e:
+                    logger.warning("片段 %d 识别失败: %s", i+1, e)
+                    failures.append((i, str(e)))
+                    chunk_result = ""
+                
+                # 检查是否请求停止，取消尚未开始的分段
+                if chunk_result == "处理已被用户停止" or (task_controller and task_controller.is_stop_requested()):
+                    logger.info("检测到停止请求，中断处理")
+                    print("处理已停止")
+                    pool.shutdown(wait=False, cancel_futures=True)
                     return "处理已被用户停止"
-            
-            print(f"处理分段 {i+1}/{chunks_number}...")
-            logger.debug(f"开始处理第{i+1}段（共{chunks_number}段）")
-            
-            # 报告进度
-            if progress_callback:
-                progress_callback(i, chunks_number)
-            
-            # 截取音频片段
-            chunk = audio[i*chunk_length_ms:(i+1)*chunk_length_ms]
-            
-            # 创建临时文件保存片段
-            fd, chunk_path = tempfile.mkstemp(suffix='.wav')
-            os.close(fd)
-            
-            try:
-                # 导出音频片段
-                logger.debug(f"导出音频片段 {i+1} 到临时文件: {chunk_path}")
-                chunk.export(chunk_path, format="wav")
                 
-                # 识别片段
-                logger.debug(f"对片段 {i+1} 进行语音识别")
-                chunk_result = transcribe_audio_baidu(chunk_path, language, progress_callback, task_controller)
+                # 写入对应的结果槽位
+                transcription[i] = chunk_result
+                finished[i] = True
                 
-                # 如果返回停止信息，则转发停止结果
-                if chunk_result == "处理已被用户停止":
-                    return chunk_result
+                # 按原始顺序输出前面已全部完成的分段文本
+                while next_to_report < chunks_number and finished[next_to_report]:
+                    if chunk_text_callback and transcription[next_to_report]:
+                        chunk_text_callback(next_to_report, transcription[next_to_report])
+                    next_to_report += 1
                 
-                # 如果识别成功，添加到结果中
-                if not chunk_result.startswith("百度语音识别服务错误"):
-                    transcription.append(chunk_result)
-                    logger.debug(f"片段 {i+1} 识别成功，结果长度: {len(chunk_result)} 字符")
-                else:
-                    logger.warning(f"片段 {i+1} 识别失败: {chunk_result}")
-                    
-            finally:
-                # 清理临时文件
-                if os.path.exists(chunk_path):
-                    logger.debug(f"删除临时文件: {chunk_path}")
-                    os.remove(chunk_path)
+                # 报告进度
+                if progress_callback:
+                    progress_callback(completed, chunks_number)
         
-        # 处理完成，报告100%进度
-        if progress_callback:
-            progress_callback(chunks_number, chunks_number)
+        # 所有分段都失败时作为识别失败处理；部分失败时返回其余分段的文本，并告知调用方结果不完整
+        if failures:
+            failed_indexes = sorted(i for i, _ in failures)
+            if len(failures) == chunks_number:
+                raise RecognitionError(f"所有{chunks_number}段识别失败: {failures[0][1]}")
+            logger.warning("%d/%d段识别失败，结果不完整，失败的分段: %s", len(failures), chunks_number,
+                           ", ".join(str(i + 1) for i in failed_indexes))
+            if failed_segments is not None:
+                failed_segments.extend(failed_indexes)
         
         # 合并结果
-        final_result = "\n".join(transcription)
-        logger.debug(f"所有片段处理完成，最终结果长度: {len(final_result)} 字符")
+        final_result = "\n".join(t for t in transcription if t)
+        logger.debug("所有片段处理完成，最终结果长度: %d 字符", len(final_result))
         return final_result
         
+    except RecognitionError:
+        raise
     except Exception as e:
-        logger.error(f"分段处理大型音频文件时出错: {str(e)}")
-        return f"处理大型音频文件时出错: {str(e)}"
+        logger.error("分段处理大型音频文件时出错: %s", e)
+        raise RecognitionError(f"处理大型音频文件时出错: {str(e)}") from e
 
-def transcribe_audio(audio_path, language="zh-CN", use_baidu=True, progress_callback=None, task_controller=None):
+def is_whisper_available():
+    """检查是否安装了本地识别所需的faster-whisper"""
+    return importlib.util.find_spec("faster_whisper") is not None
+
+def _get_whisper_model():
+    """
+    获取共享的本地Whisper模型（首次调用时加载，使用int8量化在CPU上运行）
+    """
+    global _WHISPER_MODEL
+    with _WHISPER_MODEL_LOCK:
+        if _WHISPER_MODEL is None:
+            from faster_whisper import WhisperModel
+            logger.debug("加载本地Whisper模型: %s (int8)", WHISPER_MODEL_SIZE)
+            _WHISPER_MODEL = WhisperModel(WHISPER_MODEL_SIZE, device="cpu", compute_type="int8")
+        return _WHISPER_MODEL
+
+def transcribe_audio_whisper(audio, language="zh", progress_callback=None, task_controller=None,
+                             chunk_text_callback=None):
     """
-    将音频文件转换为文字，可以选择使用百度或Google的API
+    使用本地faster-whisper模型将音频转换为文字，无需联网，也没有文件大小限制
     
     Args:
-        audio_path: 音频文件路径
+        audio: 已解码的AudioSegment、WAV音频文件路径，或内存中的WAV数据(bytes)
         language: 语言代码
-        use_baidu: 是否使用百度API
+        progress_callback: 进度回调函数，接收两个参数(已识别秒数, 总秒数)
+        task_controller: 任务控制器，用于控制暂停和停止
+        chunk_text_callback: 分段文本回调函数，每完成一段按顺序调用，接收两个参数(index, text)
+    """
+    if not is_whisper_available():
+        logger.error("未安装faster-whisper，无法使用本地识别")
+        raise RecognitionError("未安装faster-whisper，请先执行 pip install faster-whisper")
+    
+    try:
+        model = _get_whisper_model()
+        if isinstance(audio, AudioSegment):
+            # 已解码的PCM直接转换为faster-whisper接受的16kHz float32数组（numpy为faster-whisper的依赖），
+            # 避免封装成WAV后再由faster-whisper重新解码一遍
+            import numpy as np
+            audio = audio.set_frame_rate(16000).set_channels(1).set_sample_width(2)
+            samples = np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.float32)
+            samples *= 1.0 / 32768.0
+            audio = samples
+        elif isinstance(audio, (bytes, bytearray)):
+            audio = io.BytesIO(audio)
+        
+        print("正在使用本地Whisper模型转换为文字...")
+        start_time = time.time()
+        segments, info = model.transcribe(audio, language=language.split("-")[0], vad_filter=True, beam_size=1)
+        total = int(info.duration)
+        logger.debug("音频时长: %.2f秒，开始逐段识别", info.duration)
+        
+        if progress_callback:
+            progress_callback(0, total)
+        
+        # segments是惰性生成器，逐段识别并汇报进度
+        transcription = []
+        for segment in segments:
+            if task_controller:
+                task_controller.wait_if_paused()
+                if task_controller.is_stop_requested():
+                    logger.info("检测到停止请求，中断处理")
+                    return "处理已被用户停止"
+            
+            segment_text = segment.text.strip()
+            if chunk_text_callback:
+                chunk_text_callback(len(transcription), segment_text)
+            transcription.append(segment_text)
+            if progress_callback:
+                progress_callback(min(int(segment.end), total), total)
+        
+        if progress_callback:
+            progress_callback(total, total)
+        
+        text_result = "\n".join(transcription)
+        logger.debug("Whisper识别耗时: %.2f秒，结果长度: %d 字符", time.time() - start_time, len(text_result))
+        return text_result
+    except Exception as e:
+        logger.error("本地Whisper识别时发生异常: %s", e)
+        raise RecognitionError(f"本地Whisper识别异常: {str(e)}") from e
+
+def transcribe_audio(audio, language="zh-CN", use_baidu=True, progress_callback=None, task_controller=None,
+                     backend=None, chunk_text_callback=None, failed_segments=None):
+    """
+    将音频文件转换为文字，可以选择使用百度、Google的API或本地Whisper模型
+    
+    Args:
+        audio: 已解码的AudioSegment、WAV音频文件路径，或内存中的WAV数据(bytes)
+        language: 语言代码
+        use_baidu: 是否使用百度API（未指定backend时生效）
         progress_callback: 进度回调函数
         task_controller: 任务控制器，用于控制暂停和停止
+        backend: 识别后端，可选"baidu"、"google"、"whisper"
+        chunk_text_callback: 分段文本回调函数，每完成一段按顺序调用，接收两个参数(index, text)
+        failed_segments: 可选的列表，百度分段识别时识别失败的分段序号追加到其中（结果不完整）
+    
+    Returns:
+        识别结果文本；用户停止时返回"处理已被用户停止"
+    
+    Raises:
+        RecognitionError: 识别失败
     """
-    if use_baidu:
+    if backend is None:
+        backend = "baidu" if use_baidu else "google"
+    
+    if backend == "whisper":
+        logger.info("使用本地Whisper模型，语言: %s", language)
+        return transcribe_audio_whisper(audio, language, progress_callback, task_controller, chunk_text_callback)
+    elif backend == "baidu":
         # 转换语言代码格式（从Google格式转为百度格式）
         baidu_language = language.split("-")[0] if "-" in language else language
-        logger.info(f"使用百度语音识别API，语言: {baidu_language}")
-        return transcribe_audio_baidu(audio_path, baidu_language, progress_callback, task_controller)
+        logger.info("使用百度语音识别API，语言: %s", baidu_language)
+        return transcribe_audio_baidu(audio, baidu_language, progress_callback, task_controller,
+                                      chunk_text_callback, failed_segments=failed_segments)
     else:
-        logger.info(f"使用Google语音识别API，语言: {language}")
-        return transcribe_audio_google(audio_path, language)
+        logger.info("使用Google语音识别API，语言: %s", language)
+        return transcribe_audio_google(audio, language)
 
 def main():
     # 创建命令行参数解析器
@@ -328,56 +924,63 @@ def main():
     parser.add_argument('mp3_file', help='MP3文件路径')
     parser.add_argument('-o', '--output', help='输出文件路径（默认打印到控制台）')
     parser.add_argument('-l', '--language', default='zh-CN', help='语言代码（默认：zh-CN，中文）')
-    parser.add_argument('--use-google', action='store_true', help='使用Google语音识别API（默认使用百度API）')
+    parser.add_argument('--backend', choices=['baidu', 'google', 'whisper'],
+                        help='识别后端（默认：已安装faster-whisper时使用本地whisper，否则使用百度API）')
+    parser.add_argument('--use-google', action='store_true', help='使用Google语音识别API（等同于 --backend google）')
     parser.add_argument('-v', '--verbose', action='store_true', help='显示详细日志信息')
     
     args = parser.parse_args()
     
+    # 确定识别后端
+    if args.backend is None:
+        if args.use_google:
+            args.backend = "google"
+        else:
+            args.backend = "whisper" if is_whisper_available() else "baidu"
+    
     # 设置日志级别
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+        logging.getLogger("urllib3").setLevel(logging.DEBUG)
         logger.debug("启用详细日志模式")
     else:
         logging.getLogger().setLevel(logging.INFO)
     
     # 记录开始执行
-    logger.info(f"开始处理文件: {args.mp3_file}")
-    logger.info(f"语言: {args.language}")
-    logger.info(f"使用API: {'Google' if args.use_google else '百度'}")
+    logger.info("开始处理文件: %s", args.mp3_file)
+    logger.info("语言: %s", args.language)
+    logger.info("使用API: %s", BACKEND_NAMES[args.backend])
     
     # 检查文件是否存在
     if not os.path.exists(args.mp3_file):
-        logger.error(f"文件不存在: {args.mp3_file}")
+        logger.error("文件不存在: %s", args.mp3_file)
         print(f"错误：文件 {args.mp3_file} 不存在")
         return
     
-    # 转换为WAV格式
+    # 解码音频（只解码一次，之后各识别后端直接使用解码结果）
     try:
-        temp_wav = convert_mp3_to_wav(args.mp3_file)
-        logger.info("MP3转WAV成功")
+        audio = decode_mp3(args.mp3_file)
+        logger.info("MP3解码成功")
         
-        try:
-            # 转换为文字
-            logger.info("开始语音识别")
-            text = transcribe_audio(temp_wav, args.language, not args.use_google)
-            logger.info("语音识别完成")
-            
-            # 输出结果
-            if args.output:
-                with open(args.output, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                logger.info(f"结果已写入文件: {args.output}")
-                print(f"文字已保存到: {args.output}")
-            else:
-                print("\n转换结果:")
-                print("-" * 50)
-                print(text)
-                print("-" * 50)
-        finally:
-            # 删除临时文件
-            if os.path.exists(temp_wav):
-                logger.debug(f"删除临时WAV文件: {temp_wav}")
-                os.remove(temp_wav)
+        # 转换为文字
+        logger.info("开始语音识别")
+        text = transcribe_audio(audio, args.language, backend=args.backend)
+        logger.info("语音识别完成")
+        
+        # 输出结果
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text)
+            logger.info("结果已写入文件: %s", args.output)
+            print(f"文字已保存到: {args.output}")
+        else:
+            print("\n转换结果:")
+            print("-" * 50)
+            print(text)
+            print("-" * 50)
+    except RecognitionError as e:
+        logger.error("语音识别失败: %s", e)
+        print(f"错误: {str(e)}")
     except Exception as e:
         logger.exception("处理过程中发生异常")
         print(f"错误: {str(e)}")
@@ -7,10 +7,35 @@ MP3转文字工具 - 图形界面版本
 
 import os
 import sys
+import queue
 import threading
+import concurrent.futures
 import tkinter as tk
 from tkinter import filedialog, ttk, scrolledtext, messagebox
-from mp3_to_text import convert_mp3_to_wav, transcribe_audio
+
+class RingBuffer:
+    """
+    单生产者单消费者的定长环形缓冲区，写满时覆盖最旧的数据
+    写入位置只由生产者修改，读取位置只由消费者修改，在GIL下无需加锁
+    """
+    def __init__(self, size=64):
+        self._items = [None] * size
+        self._size = size
+        self._head = 0  # 已写入的总数（生产者）
+        self._tail = 0  # 已读取的总数（消费者）
+    
+    def try_push(self, item):
+        """写入一项数据，缓冲区已满时覆盖最旧的一项，从不阻塞"""
+        self._items[self._head % self._size] = item
+        self._head += 1
+    
+    def drain_latest(self):
+        """取出最新的一项并丢弃其余未读数据，没有新数据时返回None"""
+        head = self._head
+        if head == self._tail:
+            return None
+        self._tail = head
+        return self._items[(head - 1) % self._size]
 
 class MP3ToTextGUI:
     def __init__(self, root):
@@ -27,6 +52,22 @@ class MP3ToTextGUI:
         
         self.create_widgets()
         
+        # 工作线程通过事件队列向界面线程传递更新，由定时器统一处理
+        # 进度更新频繁且只有最新值有意义，单独走无锁的环形缓冲区
+        self._events = queue.Queue()
+        self._progress = RingBuffer(64)
+        self._has_partial_text = False
+        self.root.after(33, self._drain)
+        
+        # 识别模块依赖较多，窗口显示后在后台预先导入并预热百度客户端，用户选择文件时即可完成
+        threading.Thread(target=lambda: __import__('mp3_to_text').prewarm_baidu_client(), daemon=True).start()
+        
+        # 常驻的单线程工作池，转换任务依次执行，不会并发争抢API配额
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='mp3tt')
+        self._current_future = None
+        self.task_controller = None  # 首次转换时创建（避免启动时导入mp3_to_text）
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
     def create_widgets(self):
         # 主框架
         main_frame = ttk.Frame(self.root, style="TFrame")
@@ -82,6 +123,10 @@ class MP3ToTextGUI:
         self.convert_button = ttk.Button(button_frame, text="开始转换", command=self.start_conversion)
         self.convert_button.pack(side=tk.LEFT, padx=5)
         
+        # 取消按钮
+        self.cancel_button = ttk.Button(button_frame, text="取消", command=self.cancel_conversion, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        
         # 进度条
         self.progress = ttk.Progressbar(button_frame, orient=tk.HORIZONTAL, length=200, mode='indeterminate')
         self.progress.pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)
@@ -107,6 +152,72 @@ class MP3ToTextGUI:
         self.result_text.insert(tk.END, text)
         self.result_text.config(state=tk.DISABLED)
     
+    def append_result_text(self, text):
+        """追加一段已识别的文本，第一段到达时清除等待提示"""
+        self.result_text.config(state=tk.NORMAL)
+        if not self._has_partial_text:
+            self.result_text.delete(1.0, tk.END)
+            self._has_partial_text = True
+        else:
+            self.result_text.insert(tk.END, "\n")
+        self.result_text.insert(tk.END, text)
+        self.result_text.see(tk.END)
+        self.result_text.config(state=tk.DISABLED)
+    
+    def update_progress(self, current, total):
+        """根据识别进度切换为确定模式的进度条"""
+        if total > 0:
+            self.progress.stop()
+            self.progress.config(mode='determinate', maximum=total, value=current)
+    
+    def show_result(self, text):
+        """显示识别结果，需要时保存到文件"""
+        self.update_result_text(text)
+        
+        if self.save_var.get():
+            output_file = filedialog.asksaveasfilename(
+                title="保存文本文件",
+                defaultextension=".txt",
+                filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")]
+            )
+            if output_file:
+                try:
+                    with open(output_file, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                    messagebox.showinfo("成功", f"文字已保存到: {output_file}")
+                except Exception as e:
+                    messagebox.showerror("错误", f"保存文件失败: {str(e)}")
+    
+    def _drain(self):
+        """
+        每帧处理一次事件队列中积累的事件，进度只应用最新的一次
+        """
+        try:
+            while True:
+                kind, value = self._events.get_nowait()
+                if kind == 'text':
+                    self.update_result_text(value)
+                elif kind == 'append_text':
+                    self.append_result_text(value)
+                elif kind == 'result':
+                    self.show_result(value)
+                elif kind == 'error':
+                    messagebox.showerror("错误", f"转换失败: {value}")
+                    self.update_result_text(f"转换失败: {value}")
+                elif kind == 'done':
+                    # 恢复按钮状态，停止进度条
+                    self.progress.stop()
+                    self.convert_button.config(state=tk.NORMAL)
+                    self.cancel_button.config(state=tk.DISABLED)
+        except queue.Empty:
+            pass
+        
+        latest_progress = self._progress.drain_latest()
+        if latest_progress is not None:
+            self.update_progress(*latest_progress)
+        
+        self.root.after(33, self._drain)
+    
     def start_conversion(self):
         mp3_file = self.file_path.get().strip()
         
@@ -122,53 +233,89 @@ class MP3ToTextGUI:
         language_selection = self.language_combo.get()
         language_code = language_selection.split('(')[1].split(')')[0]
         
+        # 重置任务控制器
+        if self.task_controller is None:
+            from mp3_to_text import TaskController
+            self.task_controller = TaskController()
+        self.task_controller.reset()
+        
         # 禁用按钮，显示进度条
         self.convert_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress.config(mode='indeterminate', value=0)
         self.progress.start()
+        self._has_partial_text = False
         
-        # 在新线程中运行转换过程，避免界面冻结
-        threading.Thread(target=self.run_conversion, args=(mp3_file, language_code)).start()
+        # 提交到工作线程池中运行转换过程，避免界面冻结
+        self._current_future = self._pool.submit(self.run_conversion, mp3_file, language_code)
+        self._current_future.add_done_callback(self._on_done)
+    
+    def cancel_conversion(self):
+        """请求停止当前的转换任务"""
+        if self._current_future and not self._current_future.done():
+            self.task_controller.stop()
+            self.cancel_button.config(state=tk.DISABLED)
+            self._events.put(('text', "正在取消..."))
+    
+    def _on_done(self, future):
+        """转换任务结束（在工作线程中回调），通知界面恢复按钮状态"""
+        self._events.put(('done', None))
+    
+    def on_close(self):
+        """关闭窗口时停止正在进行的任务并关闭工作线程池"""
+        if self.task_controller:
+            self.task_controller.stop()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        # 识别模块已导入时关闭其保持的HTTP长连接
+        core = sys.modules.get('mp3_to_text')
+        if core is not None:
+            core.close_baidu_client()
+        self.root.destroy()
     
     def run_conversion(self, mp3_file, language_code):
         try:
+            # 延迟导入，避免拖慢界面启动
+            from mp3_to_text import decode_mp3, transcribe_audio
+            
             # 更新状态
-            self.root.after(0, lambda: self.update_result_text("正在处理中，请稍候..."))
+            self._events.put(('text', "正在处理中，请稍候..."))
+            
+            # 解码和不分段的识别请求中途无法中断，在各步骤前后检查是否已请求取消
+            if self.task_controller.is_stop_requested():
+                self._events.put(('text', "已取消"))
+                return
+            
+            # 解码音频（在内存中完成，不产生临时文件，识别时不再重复解码）
+            audio = decode_mp3(mp3_file)
+            
+            if self.task_controller.is_stop_requested():
+                self._events.put(('text', "已取消"))
+                return
             
-            # 转换为WAV格式
-            temp_wav = convert_mp3_to_wav(mp3_file)
+            # 进度回调函数
+            def progress_callback(current, total):
+                self._progress.try_push((current, total))
             
-            try:
-                # 转换为文字
-                text = transcribe_audio(temp_wav, language_code)
-                
-                # 如果需要保存到文件
-                if self.save_var.get():
-                    output_file = filedialog.asksaveasfilename(
-                        title="保存文本文件",
-                        defaultextension=".txt",
-                        filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")]
-                    )
-                    if output_file:
-                        with open(output_file, 'w', encoding='utf-8') as f:
-                            f.write(text)
-                        self.root.after(0, lambda: messagebox.showinfo("成功", f"文字已保存到: {output_file}"))
-                
-                # 显示结果
-                self.root.after(0, lambda: self.update_result_text(text))
+            # 分段文本回调函数，每完成一段立即显示
+            def chunk_text_callback(index, chunk_text):
+                self._events.put(('append_text', chunk_text))
             
-            finally:
-                # 删除临时文件
-                if os.path.exists(temp_wav):
-                    os.remove(temp_wav)
+            # 转换为文字
+            text = transcribe_audio(audio, language_code,
+                                    progress_callback=progress_callback,
+                                    task_controller=self.task_controller,
+                                    chunk_text_callback=chunk_text_callback)
+            
+            # 取消时返回的是停止提示而不是识别结果，不显示也不保存
+            if self.task_controller.is_stop_requested():
+                self._events.put(('text', "已取消"))
+                return
+            
+            # 显示结果（保存文件也在界面线程中进行）
+            self._events.put(('result', text))
         
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("错误", f"转换失败: {str(e)}"))
-            self.root.after(0, lambda: self.update_result_text(f"转换失败: {str(e)}"))
-        
-        finally:
-            # 恢复按钮状态，停止进度条
-            self.root.after(0, lambda: self.progress.stop())
-            self.root.after(0, lambda: self.convert_button.config(state=tk.NORMAL))
+            self._events.put(('error', str(e)))
 
 def main():
     root = tk.Tk()
@@ -6,27 +6,43 @@ MP3转文字工具 - PyQt5图形界面版本
 """
 
 import os
+import re
 import sys
 import time
 import threading
+import queue
+import atexit
 import logging
+import logging.handlers
 import json
+import hashlib
+import functools
+import mmap
+from collections import deque
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox, 
-                            QTextEdit, QFileDialog, QMessageBox, QProgressBar, QSplitter,
-                            QGroupBox, QRadioButton, QTabWidget, QDialog, QFormLayout)
-from PyQt5.QtCore import Qt, QObject, pyqtSignal, QMimeData, QUrl, QSettings
-from PyQt5.QtGui import QDragEnterEvent, QDropEvent, QColor, QTextCursor, QIcon, QIntValidator
-import mp3_to_text
-from mp3_to_text import convert_mp3_to_wav, transcribe_audio, TaskController
+                            QTextEdit, QPlainTextEdit, QFileDialog, QMessageBox, QProgressBar, QSplitter,
+                            QGroupBox, QRadioButton, QDialog, QFormLayout)
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, QTimer, QRunnable, QThreadPool
+from PyQt5.QtGui import QDragEnterEvent, QDropEvent, QIcon, QIntValidator
 
-# 配置日志
+# 配置日志：日志调用只把记录放入队列，由后台线程写到终端，避免工作线程阻塞在输出上
+# （force=True替换已经安装的其他处理器）
+_log_queue = queue.SimpleQueue()
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter(
+    '%(asctime)s [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+))
 logging.basicConfig(
     level=logging.DEBUG,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+    force=True
 )
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_stream_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger("MP3ToText")
 
 # 配置HTTP请求的日志
@@ -34,21 +50,463 @@ requests_log = logging.getLogger("urllib3")
 requests_log.setLevel(logging.DEBUG)
 requests_log.propagate = True
 
+def _import_core():
+    """
+    导入识别模块mp3_to_text（依赖speech_recognition、pydub、aip等，导入较慢），
+    启动时不导入，窗口显示后在后台预先导入或首次转换时导入
+    """
+    import mp3_to_text
+    # mp3_to_text导入时会把urllib3日志设为WARNING，界面需要显示HTTP请求日志
+    requests_log.setLevel(logging.DEBUG)
+    return mp3_to_text
+
+def _prewarm_core(app_id, api_key, secret_key):
+    """在后台线程中导入识别模块，已配置百度API时顺便预先创建客户端并取得access token"""
+    core = _import_core()
+    if app_id and api_key and secret_key:
+        core.BAIDU_APP_ID = app_id
+        core.BAIDU_API_KEY = api_key
+        core.BAIDU_SECRET_KEY = secret_key
+        core.prewarm_baidu_client()
+
+def baidu_api_configured(config):
+    """检查配置中的百度API密钥是否完整"""
+    return all(config.get(key) for key in ("app_id", "api_key", "secret_key"))
+
 # 配置文件路径
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
 
+# 可选语言：(显示名称, 语言代码)
+_LANGS = [
+    ("中文 (zh-CN)", "zh-CN"),
+    ("英语 (en-US)", "en-US"),
+    ("日语 (ja)", "ja"),
+    ("韩语 (ko)", "ko"),
+    ("法语 (fr)", "fr"),
+    ("德语 (de)", "de"),
+    ("俄语 (ru)", "ru"),
+]
+
+# 统计词数：每个汉字算一个词，其他语言按空白分隔的单词计数
+_WORD_RE = re.compile(r'[\u4e00-\u9fff]|[^\s\u4e00-\u9fff]+')
+
+# 文件大小显示单位
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# 识别结果缓存目录及最多保留的缓存条数
+ASR_CACHE_DIR = os.path.join(os.path.dirname(CONFIG_FILE), 'asr_cache')
+ASR_CACHE_MAX_ENTRIES = 100
+ASR_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# 缓存格式版本，写入该版本缓存的只有识别成功的结果（旧版本可能缓存了错误信息）
+ASR_CACHE_VERSION = 2
+
+# 本次运行的识别缓存命中统计
+_CACHE_STATS = {"hits": 0, "misses": 0}
+# 批量转换时多个转换任务同时更新统计
+_CACHE_STATS_LOCK = threading.Lock()
+
+# 转换任务合并发送日志的最长间隔（秒）及最多积累的日志条数
+EVENT_FLUSH_INTERVAL = 0.05
+EVENT_FLUSH_MAX_LOGS = 32
+
+# 进度条刷新间隔（毫秒）
+PROGRESS_UPDATE_INTERVAL_MS = 50
+
+# 批量转换时同时处理的文件数（配置文件中的max_concurrent_files可覆盖），百度请求总频率仍受识别模块的QPS限制
+BATCH_MAX_CONCURRENT_FILES = 5
+
+# 选择多个文件时输入框中的路径分隔符
+_BATCH_SEPARATOR = "; "
+
+# 配额扣除日志：每次扣除只追加一行，启动时或写入配置文件时合并到配置中
+QUOTA_JOURNAL = os.path.join(os.path.dirname(CONFIG_FILE), 'quota.log')
+
 # 默认配额设置（MB）
 DEFAULT_QUOTA_LIMIT_MB = 1000
 
+# 日志区域最多保留的行数
+LOG_MAX_LINES = 5000
+
+# 日志区域刷新间隔（毫秒）
+LOG_FLUSH_INTERVAL_MS = 50
+
+# 不同级别日志的图标
+_LOG_ICONS = {
+    "debug": "🔍",
+    "info": "ℹ️",
+    "warning": "⚠️",
+    "error": "❌",
+    "success": "✅"
+}
+
+# 内存中的配置，首次读取配置文件后作为唯一数据来源
+_CONFIG_CACHE = None
+
+def get_config():
+    """获取配置，只在首次调用时读取配置文件"""
+    global _CONFIG_CACHE
+    if _CONFIG_CACHE is None:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                _CONFIG_CACHE = json.load(f)
+        else:
+            _CONFIG_CACHE = {}
+    return _CONFIG_CACHE
+
+def update_config(values):
+    """更新内存中的配置并返回配置字典"""
+    global _CONFIG_CACHE
+    if _CONFIG_CACHE is None:
+        _CONFIG_CACHE = {}
+    _CONFIG_CACHE.update(values)
+    return _CONFIG_CACHE
+
+def write_config():
+    """立即将内存中的配置写入配置文件"""
+    if _CONFIG_CACHE is None:
+        return
+    
+    # 确保目录存在
+    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
+    
+    # 先写临时文件再替换，写入中途出错时不会损坏原配置文件
+    tmp_file = CONFIG_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(_CONFIG_CACHE, f, separators=(',', ':'))
+    os.replace(tmp_file, CONFIG_FILE)
+    
+    # 配置中已包含全部配额扣除，清空配额扣除日志
+    try:
+        os.remove(QUOTA_JOURNAL)
+    except FileNotFoundError:
+        pass
+
+def append_quota_journal(used_mb, digest=""):
+    """追加一条配额扣除记录"""
+    record = {"ts": time.time(), "mb": used_mb, "digest": digest}
+    with open(QUOTA_JOURNAL, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+def replay_quota_journal(config):
+    """
+    将上次运行未合并的配额扣除记录累加到配置中
+    
+    Returns:
+        累加的配额（MB），没有记录时为0
+    """
+    total_mb = 0.0
+    try:
+        with open(QUOTA_JOURNAL, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    total_mb += float(json.loads(line)["mb"])
+                except (ValueError, KeyError, TypeError):
+                    continue  # 忽略写入一半的记录
+    except FileNotFoundError:
+        return 0.0
+    config["quota_used_mb"] = config.get("quota_used_mb", 0) + total_mb
+    return total_mb
+
+def flush_config():
+    """程序退出前将配额扣除记录合并写入配置文件"""
+    if os.path.exists(QUOTA_JOURNAL):
+        try:
+            write_config()
+        except Exception as e:
+            logger.error(f"保存配置文件失败: {e}")
+
+def _stat_or_none(path):
+    """获取文件状态，文件不存在或无法访问时返回None"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+def file_digest(path):
+    """
+    计算文件内容的哈希：文件映射到内存后直接交给哈希函数，由系统按需换入页面，
+    不再逐块复制到Python的bytes对象中（空文件无法映射，按普通方式读取）
+    """
+    h = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            h.update(f.read())
+        else:
+            with mm:
+                h.update(mm)
+    return h.hexdigest()
+
+def transcription_cache_key(digest, language_code, use_baidu):
+    """根据文件内容哈希、语言和识别API生成缓存键"""
+    key = f"{digest}|{language_code}|{'baidu' if use_baidu else 'google'}|v{ASR_CACHE_VERSION}"
+    return hashlib.blake2b(key.encode(), digest_size=32).hexdigest()
+
+def load_cached_transcription(key):
+    """读取缓存的识别结果，没有缓存时返回None"""
+    cache_file = os.path.join(ASR_CACHE_DIR, f"{key}.json")
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            text = json.load(f)["text"]
+    except (OSError, ValueError, KeyError):
+        return None
+    # 更新修改时间，清理缓存时按最近使用时间保留
+    try:
+        os.utime(cache_file)
+    except OSError:
+        pass
+    return text
+
+def save_cached_transcription(key, text):
+    """保存识别结果到缓存（先写临时文件再替换，避免写入一半的缓存文件）"""
+    os.makedirs(ASR_CACHE_DIR, exist_ok=True)
+    cache_file = os.path.join(ASR_CACHE_DIR, f"{key}.json")
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({"text": text}, f, ensure_ascii=False)
+    os.replace(tmp_file, cache_file)
+
+def trim_transcription_cache(max_entries=ASR_CACHE_MAX_ENTRIES, max_bytes=ASR_CACHE_MAX_BYTES):
+    """只保留最近使用的缓存，条数不超过max_entries且总大小不超过max_bytes"""
+    try:
+        entries = [(e.path, e.stat()) for e in os.scandir(ASR_CACHE_DIR) if e.name.endswith('.json')]
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda e: e[1].st_mtime, reverse=True)
+    total_bytes = 0
+    for count, (path, st) in enumerate(entries, 1):
+        total_bytes += st.st_size
+        if count > max_entries or total_bytes > max_bytes:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def write_text_file(path, text):
+    """一次编码后直接写入文件描述符，不经过文本模式的缓冲和换行符转换"""
+    data = memoryview(text.encode('utf-8'))
+    # Windows上需要O_BINARY，否则os.write仍会把换行符转换为CRLF；权限与open()一致（受umask限制）
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+def unused_path(path):
+    """返回不存在的文件路径：path已存在时在文件名后依次添加 (1)、(2)……"""
+    base, ext = os.path.splitext(path)
+    candidate = path
+    n = 1
+    while os.path.exists(candidate):
+        candidate = f"{base} ({n}){ext}"
+        n += 1
+    return candidate
+
+def list_mp3_files(paths):
+    """将路径列表中的文件夹展开为其中的MP3文件（按文件名排序），其他路径原样保留"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(e.path for e in os.scandir(path)
+                                if e.is_file() and e.name.lower().endswith('.mp3')))
+        else:
+            files.append(path)
+    return files
+
 class WorkerSignals(QObject):
     """
     定义worker信号
     """
-    finished = pyqtSignal(str)
+    finished = pyqtSignal(str, bool, str)  # 完成信号，参数：识别文本，是否来自缓存，文件内容哈希
     error = pyqtSignal(str)
-    log = pyqtSignal(str, str)  # 日志信号，参数：日志级别，消息内容
-    progress = pyqtSignal(int, int)  # 进度信号，参数：当前进度，总进度
     status_update = pyqtSignal(str)  # 状态更新信号
+    event = pyqtSignal(dict)  # 合并事件信号，参数：包含logs、status、progress的字典
+    file_done = pyqtSignal(int)  # 批量转换中单个文件处理结束信号，参数：文件序号
+
+class ConversionTask(QRunnable):
+    """
+    转换任务，在Qt线程池中执行MP3转文字
+    """
+    def __init__(self, mp3_file, language_code, use_baidu, save_to_file, task_controller, signals):
+        super().__init__()
+        self.mp3_file = mp3_file
+        self.language_code = language_code
+        self.use_baidu = use_baidu
+        self.save_to_file = save_to_file
+        self.task_controller = task_controller
+        self.signals = signals
+        
+        # 待发送的日志，按时间间隔或在状态、进度变化时合并成一个事件发送
+        self._pending_logs = []
+        self._last_flush = time.monotonic()
+    
+    def log(self, level, message):
+        """记录日志，间隔超过EVENT_FLUSH_INTERVAL或积累超过EVENT_FLUSH_MAX_LOGS条时发送给界面"""
+        self._pending_logs.append((level, message))
+        if (len(self._pending_logs) >= EVENT_FLUSH_MAX_LOGS
+                or time.monotonic() - self._last_flush >= EVENT_FLUSH_INTERVAL):
+            self.flush_events()
+    
+    def flush_events(self, status=None, progress=None):
+        """将积累的日志连同状态、进度合并为一个事件发送给界面"""
+        event = {}
+        if self._pending_logs:
+            event['logs'] = self._pending_logs
+            self._pending_logs = []
+        if status is not None:
+            event['status'] = status
+        if progress is not None:
+            event['progress'] = progress
+        if event:
+            self.signals.event.emit(event)
+        self._last_flush = time.monotonic()
+    
+    def run(self):
+        # start_conversion中已经导入过，这里直接取已导入的模块
+        core = _import_core()
+        try:
+            self.log("info", f"开始处理文件: {os.path.basename(self.mp3_file)}")
+            
+            # 记录开始时间
+            start_time = time.time()
+            self.log("debug", "记录转换开始时间")
+            
+            # 文件内容哈希只计算一次，同时用作识别缓存键和配额扣除记录
+            # 同一文件、语言和API之前识别过时直接使用缓存结果
+            digest = ""
+            cache_key = None
+            # 以下各步骤可能耗时较长，开始前先把积累的日志发送给界面
+            self.flush_events()
+            try:
+                digest = file_digest(self.mp3_file)
+                cache_key = transcription_cache_key(digest, self.language_code, self.use_baidu)
+                cached_text = load_cached_transcription(cache_key)
+            except OSError as e:
+                self.log("debug", f"读取识别缓存失败: {str(e)}")
+                cached_text = None
+            with _CACHE_STATS_LOCK:
+                _CACHE_STATS["hits" if cached_text is not None else "misses"] += 1
+                hits, misses = _CACHE_STATS["hits"], _CACHE_STATS["misses"]
+            self.log("debug", f"识别缓存命中 {hits} 次，未命中 {misses} 次")
+            if cached_text is not None:
+                self.log("success", "找到该文件的识别缓存，跳过转换和识别")
+                self.flush_events(status="已完成")
+                self.signals.finished.emit(cached_text, True, digest)
+                return
+            
+            # 转换为WAV格式
+            self.log("info", "步骤1: 将MP3转换为WAV格式")
+            self.log("debug", f"源文件: {self.mp3_file}")
+            
+            # 获取MP3文件时长
+            try:
+                from mutagen.mp3 import MP3
+                audio = MP3(self.mp3_file)  # 已知是MP3文件，只解析MP3帧头，不逐个尝试其他格式
+                if audio:
+                    duration = audio.info.length
+                    self.log("info", f"音频时长: {int(duration//60)}分{int(duration%60)}秒")
+                    if self.use_baidu and duration * 1000 > core.BAIDU_MAX_DURATION_MS:
+                        self.log("info", f"音频超过{core.BAIDU_MAX_DURATION_MS // 1000}秒，将使用分段处理")
+            except Exception as e:
+                self.log("debug", f"获取音频时长失败: {str(e)}")
+            
+            # 暂停时在此等待，请求停止时抛出TaskStopped
+            self.flush_events()
+            self.task_controller.checkpoint("WAV转换")
+            
+            self.log("debug", "开始调用decode_mp3函数")
+            self.flush_events()
+            # 解码结果直接保存在内存中，不再写入临时WAV文件
+            audio = core.decode_mp3(self.mp3_file)
+            self.log("success", "MP3解码完成")
+            self.log("debug", f"解码后音频时长: {len(audio)/1000:.1f} 秒")
+            
+            # 暂停时在此等待，请求停止时抛出TaskStopped
+            self.flush_events()
+            self.task_controller.checkpoint("语音识别")
+            
+            # 转换为文字
+            self.log("info", "步骤2: 开始语音识别")
+            self.log("info", f"使用语言: {self.language_code}")
+            
+            api_name = "百度API" if self.use_baidu else "Google API"
+            self.log("debug", f"调用{api_name}识别服务")
+            
+            # 进度回调函数
+            def progress_callback(current, total):
+                self.flush_events(progress=(current, total))
+            
+            # 使用选择的API进行识别（识别失败时抛出RecognitionError，由下面的异常处理发送错误信号）
+            # 部分分段识别失败时不抛出异常，失败的分段序号记录在failed_segments中
+            failed_segments = []
+            self.flush_events()
+            text = core.transcribe_audio(audio, self.language_code, self.use_baidu, progress_callback, self.task_controller,
+                                         failed_segments=failed_segments)
+            
+            # 检查是否被用户停止（停止时结果不完整，不写入缓存）
+            if text == "处理已被用户停止" or self.task_controller.is_stop_requested():
+                self.log("info", "处理已被用户停止")
+                self.flush_events(status="已停止")
+                return
+            
+            # 记录识别到的文本信息
+            if text:
+                word_count = sum(1 for _ in _WORD_RE.finditer(text))
+                self.log("success", "语音识别成功")
+                self.log("info", f"识别到约 {word_count} 个单词")
+            else:
+                self.log("warning", "识别成功，但未检测到文本内容")
+            if failed_segments:
+                self.log("warning", f"第 {', '.join(str(i + 1) for i in failed_segments)} 段识别失败，结果不完整")
+            
+            # 保存识别结果到缓存（结果不完整时不写入缓存，下次重新识别）
+            if text and cache_key and not failed_segments:
+                try:
+                    save_cached_transcription(cache_key, text)
+                    self.log("debug", "识别结果已写入缓存")
+                except OSError as e:
+                    self.log("debug", f"写入识别缓存失败: {str(e)}")
+            
+            # 计算处理时间
+            elapsed_time = time.time() - start_time
+            self.log("info", f"总处理时间: {elapsed_time:.2f} 秒")
+            
+            # 如果需要保存到文件
+            if self.save_to_file:
+                self.log("info", "用户选择保存到文件")
+            
+            # 发送完成信号
+            self.log("success", "转换流程完成")
+            self.flush_events(status="已完成")
+            self.signals.finished.emit(text, False, digest)
+        
+        except core.TaskStopped as e:
+            self.log("info", f"在{e}前检测到停止请求")
+            self.flush_events(status="已停止")
+        
+        except Exception as e:
+            # 发送错误信号
+            self.log("error", f"转换过程出错: {str(e)}")
+            self.flush_events(status="已停止")
+            self.signals.error.emit(str(e))
+
+class BatchConversionTask(ConversionTask):
+    """
+    批量转换中的单个文件任务，无论成功、失败或停止，结束后都发出file_done信号
+    """
+    def __init__(self, index, *args):
+        super().__init__(*args)
+        self.index = index
+    
+    def run(self):
+        try:
+            # 已请求停止时，排队中的文件直接跳过
+            if not self.task_controller.is_stop_requested():
+                super().run()
+        finally:
+            self.signals.file_done.emit(self.index)
 
 class FileDragDropLineEdit(QLineEdit):
     """
@@ -65,9 +523,10 @@ class FileDragDropLineEdit(QLineEdit):
     def dropEvent(self, event: QDropEvent):
         urls = event.mimeData().urls()
         if urls and len(urls) > 0:
-            file_path = urls[0].toLocalFile()
-            if file_path.lower().endswith('.mp3'):
-                self.setText(file_path)
+            # 支持同时拖放多个MP3文件或文件夹，进行批量转换
+            files = [f for f in list_mp3_files(url.toLocalFile() for url in urls) if f.lower().endswith('.mp3')]
+            if files:
+                self.setText(_BATCH_SEPARATOR.join(files))
             else:
                 QMessageBox.warning(self, "警告", "请拖放MP3文件")
 
@@ -136,13 +595,9 @@ class APISettingsDialog(QDialog):
     def load_config(self):
         """从配置文件加载设置"""
         try:
-            if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-            else:
-                self.config = {}
-        except Exception as e:
-            print(f"加载配置文件失败: {e}")
+            self.config = get_config()
+        except Exception:
+            logger.exception("加载配置文件失败")
             self.config = {}
     
     def toggle_key_visibility(self, checked):
@@ -168,17 +623,9 @@ class APISettingsDialog(QDialog):
         }
         
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-            
-            # 保存到配置文件
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=4)
-            
-            # 设置到模块
-            mp3_to_text.BAIDU_APP_ID = config_data["app_id"]
-            mp3_to_text.BAIDU_API_KEY = config_data["api_key"]
-            mp3_to_text.BAIDU_SECRET_KEY = config_data["secret_key"]
+            # 更新内存中的配置并保存到配置文件
+            update_config(config_data)
+            write_config()
             
             QMessageBox.information(self, "成功", f"百度API设置已保存到: {CONFIG_FILE}")
             self.accept()
@@ -186,6 +633,43 @@ class APISettingsDialog(QDialog):
             QMessageBox.critical(self, "错误", f"保存配置失败: {str(e)}")
 
 class MP3ToTextGUI(QMainWindow):
+    # 配额显示在不同剩余比例下的样式
+    _QUOTA_STYLES = {
+        band: f"""
+            {color_style}
+            padding: 5px 10px;
+            border-radius: 4px;
+            font-weight: bold;
+        """
+        for band, color_style in (
+            ("red", "background-color: #ffebee; border: 1px solid #ffcdd2;"),
+            ("yellow", "background-color: #fff8e1; border: 1px solid #ffecb3;"),
+            ("green", "background-color: #e8f5e9; border: 1px solid #c8e6c9;"),
+        )
+    }
+    
+    # 暂停/恢复按钮的样式只设置一次，切换时通过state属性选择对应样式，无需重新解析样式表
+    _PAUSE_RESUME_STYLE = """
+        QPushButton {
+            color: white;
+            border: none;
+            padding: 8px 16px;
+            border-radius: 4px;
+        }
+        QPushButton[state="running"] {
+            background-color: #FFA000;
+        }
+        QPushButton[state="running"]:hover {
+            background-color: #FF8F00;
+        }
+        QPushButton[state="paused"] {
+            background-color: #4CAF50;
+        }
+        QPushButton[state="paused"]:hover {
+            background-color: #45a049;
+        }
+    """
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("MP3转文字工具")
@@ -193,20 +677,26 @@ class MP3ToTextGUI(QMainWindow):
         
         # 配置数据
         self.config = {}
+        self._last_quota_band = None
         
-        # 任务控制器
-        self.task_controller = TaskController()
-        self.conversion_thread = None
+        # 任务控制器，首次转换时创建（避免启动时导入mp3_to_text）
+        self.task_controller = None
+        self.conversion_task = None
+        self.batch_pool = None
+        self._batch = None
         self.is_converting = False
         self.is_paused = False
         
-        # 初始化信号
+        # 复用的消息框，各种提示只需切换图标和文字
+        self._msgbox = QMessageBox(self)
+        self._msgbox.setStandardButtons(QMessageBox.Ok)
+        
+        # 初始化信号（信号由工作线程发出，明确使用队列连接，在界面线程中处理）
         self.worker_signals = WorkerSignals()
-        self.worker_signals.finished.connect(self.on_conversion_finished)
-        self.worker_signals.error.connect(self.on_conversion_error)
-        self.worker_signals.log.connect(self.on_log)
-        self.worker_signals.progress.connect(self.on_progress)
-        self.worker_signals.status_update.connect(self.on_status_update)
+        self.worker_signals.finished.connect(self.on_conversion_finished, Qt.QueuedConnection)
+        self.worker_signals.error.connect(self.on_conversion_error, Qt.QueuedConnection)
+        self.worker_signals.status_update.connect(self.on_status_update, Qt.QueuedConnection)
+        self.worker_signals.event.connect(self.on_event, Qt.QueuedConnection)
         
         # 主窗口部件
         central_widget = QWidget()
@@ -230,7 +720,7 @@ class MP3ToTextGUI(QMainWindow):
         main_layout.addLayout(file_layout)
         
         # 添加提示标签
-        hint_label = QLabel("提示: 您可以直接拖放MP3文件到输入框")
+        hint_label = QLabel("提示: 您可以直接拖放MP3文件到输入框，选择多个文件或文件夹时批量转换")
         hint_label.setStyleSheet("color: gray; font-size: 12px;")
         main_layout.addWidget(hint_label)
         
@@ -282,17 +772,7 @@ class MP3ToTextGUI(QMainWindow):
         language_label = QLabel("语言:")
         self.language_combo = QComboBox()
         
-        languages = [
-            "中文 (zh-CN)",
-            "英语 (en-US)",
-            "日语 (ja)",
-            "韩语 (ko)",
-            "法语 (fr)",
-            "德语 (de)",
-            "俄语 (ru)"
-        ]
-        
-        self.language_combo.addItems(languages)
+        self.language_combo.addItems([name for name, _ in _LANGS])
         language_frame.addWidget(language_label)
         language_frame.addWidget(self.language_combo)
         language_frame.addStretch()
@@ -305,6 +785,8 @@ class MP3ToTextGUI(QMainWindow):
         self.http_debug_check = QCheckBox("显示HTTP请求日志")
         self.verbose_check.setChecked(True)
         self.http_debug_check.setChecked(True)
+        self._http_debug = self.http_debug_check.isChecked()
+        self.http_debug_check.toggled.connect(self.on_http_debug_toggled)
         output_layout.addWidget(self.save_check)
         output_layout.addWidget(self.verbose_check)
         output_layout.addWidget(self.http_debug_check)
@@ -340,18 +822,8 @@ class MP3ToTextGUI(QMainWindow):
         self.pause_resume_button = QPushButton("暂停")
         self.pause_resume_button.clicked.connect(self.toggle_pause_resume)
         self.pause_resume_button.setEnabled(False)
-        self.pause_resume_button.setStyleSheet("""
-            QPushButton {
-                background-color: #FFA000;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #FF8F00;
-            }
-        """)
+        self.pause_resume_button.setProperty("state", "running")
+        self.pause_resume_button.setStyleSheet(self._PAUSE_RESUME_STYLE)
         
         # 尝试添加图标
         try:
@@ -385,6 +857,14 @@ class MP3ToTextGUI(QMainWindow):
         self.progress_bar = QProgressBar()
         self.progress_bar.setTextVisible(True)  # 显示百分比文本
         
+        # 进度先记录下来，由定时器定期刷新到进度条
+        self._pending_progress = None
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(PROGRESS_UPDATE_INTERVAL_MS)
+        self._progress_timer.setSingleShot(False)
+        self._progress_timer.timeout.connect(self.apply_pending_progress)
+        self._progress_timer.start()
+        
         button_layout.addWidget(self.convert_button)
         button_layout.addWidget(self.pause_resume_button)
         button_layout.addWidget(self.stop_button)
@@ -444,10 +924,17 @@ class MP3ToTextGUI(QMainWindow):
         log_header.addWidget(self.clear_log_button)
         log_layout.addLayout(log_header)
         
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(LOG_MAX_LINES)
         log_layout.addWidget(self.log_text)
         
+        # 日志先进入缓冲队列，由定时器批量写入日志区域
+        self._pending_logs = deque()
+        self._log_flush_timer = QTimer(self)
+        self._log_flush_timer.timeout.connect(self.flush_logs)
+        self._log_flush_timer.start(LOG_FLUSH_INTERVAL_MS)
+        
         # 添加到分割器
         splitter.addWidget(result_container)
         splitter.addWidget(log_container)
@@ -469,7 +956,7 @@ class MP3ToTextGUI(QMainWindow):
             QLabel {
                 font-size: 14px;
             }
-            QLineEdit, QTextEdit {
+            QLineEdit, QTextEdit, QPlainTextEdit {
                 border: 1px solid #ddd;
                 padding: 5px;
                 border-radius: 4px;
@@ -498,30 +985,53 @@ class MP3ToTextGUI(QMainWindow):
         # 加载百度API设置 - 移动到UI组件初始化之后
         self.load_baidu_api_settings()
         
+        # 合并上次运行未写入配置文件的配额扣除记录
+        try:
+            replayed_mb = replay_quota_journal(self.config)
+            if replayed_mb:
+                write_config()
+                self.add_log("info", f"已合并配额扣除记录: {replayed_mb:.2f} MB")
+        except Exception as e:
+            self.add_log("error", f"合并配额扣除记录失败: {str(e)}")
+        
         # 更新配额显示
         self.update_quota_display()
         
+        # 清理过多的识别缓存（删除文件可能较慢，放到后台线程，不阻塞窗口显示）
+        threading.Thread(target=trim_transcription_cache, daemon=True).start()
+        
         # 添加欢迎信息
         self.add_log("info", "欢迎使用MP3转文字工具！")
         self.add_log("info", "请选择一个MP3文件进行转换")
         self.add_log("info", f"当前系统时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         # 检查百度API配置
-        if not mp3_to_text.BAIDU_APP_ID or not mp3_to_text.BAIDU_API_KEY or not mp3_to_text.BAIDU_SECRET_KEY:
+        if not baidu_api_configured(self.config):
             self.add_log("warning", "百度API未配置，请点击百度API设置按钮进行配置")
+        
+        # 识别模块依赖较多，窗口显示后在后台预先导入并预热百度客户端，用户选择文件时即可完成
+        threading.Thread(
+            target=_prewarm_core,
+            args=(self.config.get("app_id", ""), self.config.get("api_key", ""), self.config.get("secret_key", "")),
+            daemon=True
+        ).start()
+    
+    def _show_msg(self, icon, title, text, buttons=QMessageBox.Ok, default_button=QMessageBox.NoButton):
+        """使用复用的消息框显示提示，返回用户点击的按钮"""
+        self._msgbox.setIcon(icon)
+        self._msgbox.setWindowTitle(title)
+        self._msgbox.setText(text)
+        self._msgbox.setStandardButtons(buttons)
+        self._msgbox.setDefaultButton(default_button)
+        return self._msgbox.exec_()
     
     def load_baidu_api_settings(self):
         """从配置文件加载百度API设置"""
         try:
-            if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-                
-                mp3_to_text.BAIDU_APP_ID = self.config.get("app_id", "")
-                mp3_to_text.BAIDU_API_KEY = self.config.get("api_key", "")
-                mp3_to_text.BAIDU_SECRET_KEY = self.config.get("secret_key", "")
-                
-                if all([mp3_to_text.BAIDU_APP_ID, mp3_to_text.BAIDU_API_KEY, mp3_to_text.BAIDU_SECRET_KEY]):
+            config_exists = os.path.exists(CONFIG_FILE)
+            self.config = get_config()
+            if config_exists:
+                if baidu_api_configured(self.config):
                     self.add_log("info", "已从配置文件加载百度API设置")
                 else:
                     self.add_log("warning", "配置文件中的百度API设置不完整")
@@ -533,45 +1043,48 @@ class MP3ToTextGUI(QMainWindow):
                     self.config["quota_used_mb"] = 0
             else:
                 self.add_log("info", "未找到配置文件，将使用默认设置")
-                self.config = {
+                self.config = update_config({
                     "app_id": "",
                     "api_key": "",
                     "secret_key": "",
                     "quota_limit_mb": DEFAULT_QUOTA_LIMIT_MB,
                     "quota_used_mb": 0
-                }
+                })
         except Exception as e:
             self.add_log("error", f"加载配置文件失败: {str(e)}")
-            self.config = {
+            self.config = update_config({
                 "quota_limit_mb": DEFAULT_QUOTA_LIMIT_MB,
                 "quota_used_mb": 0
-            }
+            })
+    
+    def remaining_quota_mb(self):
+        """剩余配额（MB）"""
+        limit_mb = self.config.get("quota_limit_mb", DEFAULT_QUOTA_LIMIT_MB)
+        return max(0, limit_mb - self.config.get("quota_used_mb", 0))
     
     def update_quota_display(self):
         """更新配额显示"""
         limit_mb = self.config.get("quota_limit_mb", DEFAULT_QUOTA_LIMIT_MB)
-        used_mb = self.config.get("quota_used_mb", 0)
-        remaining_mb = max(0, limit_mb - used_mb)
+        remaining_mb = self.remaining_quota_mb()
         
         # 设置样式
         if remaining_mb < limit_mb * 0.1:  # 小于10%显示红色
-            color_style = "background-color: #ffebee; border: 1px solid #ffcdd2;"
+            band = "red"
         elif remaining_mb < limit_mb * 0.3:  # 小于30%显示黄色
-            color_style = "background-color: #fff8e1; border: 1px solid #ffecb3;"
+            band = "yellow"
         else:  # 正常显示绿色
-            color_style = "background-color: #e8f5e9; border: 1px solid #c8e6c9;"
+            band = "green"
         
         self.quota_display.setText(f"{remaining_mb:.2f} MB / {limit_mb} MB")
-        self.quota_display.setStyleSheet(f"""
-            {color_style}
-            padding: 5px 10px;
-            border-radius: 4px;
-            font-weight: bold;
-        """)
+        # 颜色区间变化时才重新设置样式表，避免Qt重复解析样式
+        if band != self._last_quota_band:
+            self.quota_display.setStyleSheet(self._QUOTA_STYLES[band])
+            self._last_quota_band = band
         
-        # 如果配额用尽，禁用转换按钮
+        # 如果配额用尽，禁用转换按钮（转换进行中按钮保持禁用，结束时由on_status_update按配额恢复）
         if hasattr(self, 'convert_button'):
-            self.convert_button.setEnabled(remaining_mb > 0)
+            if not self.is_converting:
+                self.convert_button.setEnabled(remaining_mb > 0)
             if remaining_mb <= 0:
                 self.add_log("warning", "配额已用尽，请联系管理员增加配额")
     
@@ -581,7 +1094,7 @@ class MP3ToTextGUI(QMainWindow):
         dialog.exec_()
         
         # 在对话框关闭后检查设置
-        if mp3_to_text.BAIDU_APP_ID and mp3_to_text.BAIDU_API_KEY and mp3_to_text.BAIDU_SECRET_KEY:
+        if baidu_api_configured(self.config):
             self.add_log("success", "百度API配置已更新")
         else:
             self.add_log("warning", "百度API配置不完整，使用百度API可能会失败")
@@ -593,7 +1106,7 @@ class MP3ToTextGUI(QMainWindow):
         # 获取用户主目录作为起始目录
         home_dir = os.path.expanduser("~")
         
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, 
             "选择MP3文件", 
             home_dir,  # 起始目录
@@ -601,63 +1114,58 @@ class MP3ToTextGUI(QMainWindow):
             options=options
         )
         
+        # 选择了多个文件时批量转换
+        if len(file_paths) > 1:
+            self.file_entry.setText(_BATCH_SEPARATOR.join(file_paths))
+            total_size = sum(st.st_size for st in map(_stat_or_none, file_paths) if st is not None)
+            self.add_log("info", f"已选择{len(file_paths)}个文件，共 {self.format_size(total_size)}")
+            return
+        
+        file_path = file_paths[0] if file_paths else ""
         if file_path:
             self.file_entry.setText(file_path)
             self.add_log("info", f"已选择文件: {file_path}")
-            # 验证文件是否存在
-            if not os.path.exists(file_path):
-                QMessageBox.warning(self, "警告", f"文件 {file_path} 不存在")
+            # 验证文件是否存在并获取文件大小（只调用一次stat）
+            st = _stat_or_none(file_path)
+            if st is None:
+                self._show_msg(QMessageBox.Warning, "警告", f"文件 {file_path} 不存在")
                 self.add_log("error", f"文件 {file_path} 不存在")
             else:
-                # 获取文件大小
-                file_size = os.path.getsize(file_path)
-                self.add_log("info", f"文件大小: {self.format_size(file_size)}")
+                self.add_log("info", f"文件大小: {self.format_size(st.st_size)}")
     
     def format_size(self, size_bytes):
         """格式化文件大小显示"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} TB"
+        if size_bytes <= 0:
+            return f"0.00 {_SIZE_UNITS[0]}"
+        # 每1024倍换一个单位，用二进制位数直接确定单位（小于1的小数位数为0，下限取B）
+        idx = min(max(0, (int(size_bytes).bit_length() - 1) // 10), len(_SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (idx * 10)):.2f} {_SIZE_UNITS[idx]}"
     
     def clear_log(self):
         """清除日志区域"""
+        self._pending_logs.clear()
         self.log_text.clear()
         self.add_log("info", "日志已清除")
     
+    def on_http_debug_toggled(self, checked):
+        """记录是否显示HTTP请求日志"""
+        self._http_debug = checked
+    
     def add_log(self, level, message):
         """将日志添加到日志区域"""
         if not self.verbose_check.isChecked() and level == "debug":
             return
             
         # 如果是HTTP请求日志但用户选择不显示，则跳过
-        if "Starting new HTTP" in message or "https://" in message:
-            if not self.http_debug_check.isChecked():
-                return
+        if not self._http_debug and (message.startswith("Starting new HTTP") or "https://" in message):
+            return
             
         timestamp = datetime.now().strftime("%H:%M:%S")
-        color = {
-            "debug": "gray",
-            "info": "black",
-            "warning": "orange",
-            "error": "red",
-            "success": "green"
-        }.get(level, "black")
-        
-        # 为不同级别的日志设置图标
-        icon = {
-            "debug": "🔍",
-            "info": "ℹ️",
-            "warning": "⚠️",
-            "error": "❌",
-            "success": "✅"
-        }.get(level, "")
-        
-        formatted_log = f"<span style='color:{color};'>[{timestamp}] {icon} {message}</span>"
-        self.log_text.moveCursor(QTextCursor.End)
-        self.log_text.insertHtml(formatted_log + "<br>")
-        self.log_text.moveCursor(QTextCursor.End)
+        
+        # 日志级别图标，作为纯文本日志的级别前缀
+        icon = _LOG_ICONS.get(level, "")
+        
+        self._pending_logs.append(f"[{timestamp}] {icon} {message}")
         
         # 同时记录到系统日志
         if level == "debug":
@@ -669,87 +1177,127 @@ class MP3ToTextGUI(QMainWindow):
         elif level == "error":
             logger.error(message)
     
-    def on_log(self, level, message):
-        """从工作线程接收日志并添加到日志区域"""
-        self.add_log(level, message)
+    def flush_logs(self):
+        """将缓冲队列中的日志一次性写入日志区域"""
+        if not self._pending_logs:
+            return
+        batch = list(self._pending_logs)
+        self._pending_logs.clear()
+        self.log_text.appendPlainText("\n".join(batch))
+    
+    def on_event(self, event):
+        """处理工作线程合并发送的日志、进度和状态"""
+        for level, message in event.get('logs', ()):
+            self.add_log(level, message)
+        if 'progress' in event:
+            self.on_progress(*event['progress'])
+        if 'status' in event:
+            self.on_status_update(event['status'])
+    
+    def selected_files(self):
+        """返回输入框中选择的文件列表（文件夹展开为其中的MP3文件）"""
+        text = self.file_entry.text().strip()
+        if not text:
+            return []
+        if os.path.exists(text):
+            return list_mp3_files([text])
+        return list_mp3_files([p.strip() for p in text.split(_BATCH_SEPARATOR.strip()) if p.strip()])
+    
+    def _confirm_baidu_configured(self, use_baidu):
+        """检查百度API设置（如果使用百度API），用户选择立即配置时返回False"""
+        if use_baidu and not baidu_api_configured(self.config):
+            reply = self._show_msg(
+                QMessageBox.Question, 
+                "API未配置", 
+                "您选择了百度API但尚未配置密钥。是否立即配置？", 
+                QMessageBox.Yes | QMessageBox.No, 
+                QMessageBox.Yes
+            )
+            if reply == QMessageBox.Yes:
+                self.show_baidu_api_settings()
+                return False
+            self.add_log("warning", "使用未配置的百度API继续操作")
+        return True
+    
+    def _prepare_core(self):
+        """导入识别模块、设置百度API密钥并重置任务控制器"""
+        core = _import_core()
+        core.BAIDU_APP_ID = self.config.get("app_id", "")
+        core.BAIDU_API_KEY = self.config.get("api_key", "")
+        core.BAIDU_SECRET_KEY = self.config.get("secret_key", "")
+        
+        # 重置任务控制器
+        if self.task_controller is None:
+            self.task_controller = core.TaskController()
+        self.task_controller.reset()
+        return core
     
     def start_conversion(self):
-        mp3_file = self.file_entry.text().strip()
+        files = self.selected_files()
+        if len(files) > 1:
+            self.batch_convert(files)
+            return
+        mp3_file = files[0] if files else ""
         
         if not mp3_file:
-            QMessageBox.critical(self, "错误", "请选择MP3文件")
+            self._show_msg(QMessageBox.Critical, "错误", "请选择MP3文件")
             self.add_log("error", "未选择MP3文件")
             return
         
-        if not os.path.exists(mp3_file):
-            QMessageBox.critical(self, "错误", f"文件 {mp3_file} 不存在")
+        # 文件状态只获取一次，存在检查和配额检查共用
+        st = _stat_or_none(mp3_file)
+        if st is None:
+            self._show_msg(QMessageBox.Critical, "错误", f"文件 {mp3_file} 不存在")
             self.add_log("error", f"文件 {mp3_file} 不存在")
             return
         
         # 检查文件大小和配额
-        file_size_mb = os.path.getsize(mp3_file) / (1024 * 1024)
+        file_size_mb = st.st_size / (1024 * 1024)
         remaining_quota = self.config.get("quota_limit_mb", DEFAULT_QUOTA_LIMIT_MB) - self.config.get("quota_used_mb", 0)
         
         if file_size_mb > remaining_quota:
-            QMessageBox.critical(self, "配额不足", 
-                             f"文件大小 ({file_size_mb:.2f} MB) 超过剩余配额 ({remaining_quota:.2f} MB)。\n请使用较小的文件或联系管理员增加配额。")
+            self._show_msg(QMessageBox.Critical, "配额不足", 
+                           f"文件大小 ({file_size_mb:.2f} MB) 超过剩余配额 ({remaining_quota:.2f} MB)。\n请使用较小的文件或联系管理员增加配额。")
             self.add_log("error", f"配额不足，文件大小: {file_size_mb:.2f} MB，剩余配额: {remaining_quota:.2f} MB")
             return
         
         # 检查百度API设置（如果使用百度API）
         use_baidu = self.baidu_api_radio.isChecked()
-        if use_baidu and (not mp3_to_text.BAIDU_APP_ID or not mp3_to_text.BAIDU_API_KEY or not mp3_to_text.BAIDU_SECRET_KEY):
-            reply = QMessageBox.question(
-                self, 
-                "API未配置", 
-                "您选择了百度API但尚未配置密钥。是否立即配置？", 
-                QMessageBox.Yes | QMessageBox.No, 
-                QMessageBox.Yes
-            )
-            if reply == QMessageBox.Yes:
-                self.show_baidu_api_settings()
-                return
-            self.add_log("warning", "使用未配置的百度API继续操作")
+        if not self._confirm_baidu_configured(use_baidu):
+            return
         
         if not mp3_file.lower().endswith('.mp3'):
             self.add_log("warning", "选择的文件可能不是MP3格式")
-            QMessageBox.warning(self, "警告", "选择的文件可能不是MP3格式")
-            reply = QMessageBox.question(self, "确认", "选择的文件可能不是MP3格式，是否继续？", 
-                                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            self._show_msg(QMessageBox.Warning, "警告", "选择的文件可能不是MP3格式")
+            reply = self._show_msg(QMessageBox.Question, "确认", "选择的文件可能不是MP3格式，是否继续？", 
+                                   QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.No:
                 self.add_log("info", "用户取消了转换")
                 return
             self.add_log("info", "用户确认继续转换非MP3文件")
         
         # 获取语言代码
-        language_selection = self.language_combo.currentText()
-        language_code = language_selection.split('(')[1].split(')')[0]
+        language_selection, language_code = _LANGS[self.language_combo.currentIndex()]
         self.add_log("info", f"转换语言: {language_selection}")
         
         # 记录使用的API
         api_type = "百度" if use_baidu else "Google"
         self.add_log("info", f"使用{api_type}语音识别API")
         
-        # 重置任务控制器
-        self.task_controller.reset()
+        # 导入识别模块、设置百度API密钥并重置任务控制器
+        self._prepare_core()
         
         # 初始化按钮状态
         self.worker_signals.status_update.emit("开始处理")
         
         # 初始化进度条
+        self._pending_progress = None
         if self.progress_bar.value() != 0:
             self.progress_bar.setValue(0)
         
-        # 检查文件大小，预测是否需要分段处理
-        file_size = os.path.getsize(mp3_file)
-        if file_size > 10 * 1024 * 1024 and use_baidu:
-            # 大文件会分段处理，设置进度条为等待模式
-            self.add_log("info", "检测到大文件，将使用分段处理")
-            self.progress_bar.setRange(0, 100)
-            self.progress_bar.setValue(0)
-        else:
-            # 小文件不会分段，设置进度条为不确定模式
-            self.progress_bar.setRange(0, 0)  # 不确定模式
+        # 进度条先设为不确定模式，分段处理时收到第一次进度后切换为百分比
+        # （是否分段由音频时长决定，在转换任务读取时长后提示）
+        self.progress_bar.setRange(0, 0)
         
         self.add_log("info", "开始转换流程")
         
@@ -759,156 +1307,179 @@ class MP3ToTextGUI(QMainWindow):
         # 记录文件大小用于后续扣款
         self.current_file_size_mb = file_size_mb
         
-        # 在新线程中运行转换过程
+        # 在Qt线程池中运行转换过程
         self.add_log("info", "启动转换线程")
-        self.conversion_thread = threading.Thread(
-            target=self.run_conversion,
-            args=(mp3_file, language_code, use_baidu),
-            daemon=True
-        )
-        self.conversion_thread.start()
+        self.conversion_task = ConversionTask(mp3_file, language_code, use_baidu,
+                                              self.save_check.isChecked(),
+                                              self.task_controller, self.worker_signals)
+        QThreadPool.globalInstance().start(self.conversion_task)
+    
+    def batch_convert(self, paths):
+        """
+        批量转换多个文件：每个文件一个任务，在专用线程池中并发处理，结果按文件顺序汇总
+        """
+        # 文件状态只获取一次，存在检查和配额检查共用
+        stats = [_stat_or_none(path) for path in paths]
+        missing = [path for path, st in zip(paths, stats) if st is None]
+        if missing:
+            self._show_msg(QMessageBox.Critical, "错误", f"文件 {missing[0]} 不存在")
+            self.add_log("error", f"{len(missing)}个文件不存在: {missing[0]}")
+            return
+        
+        # 检查文件总大小和配额
+        sizes_mb = [st.st_size / (1024 * 1024) for st in stats]
+        total_mb = sum(sizes_mb)
+        remaining_quota = self.config.get("quota_limit_mb", DEFAULT_QUOTA_LIMIT_MB) - self.config.get("quota_used_mb", 0)
+        if total_mb > remaining_quota:
+            self._show_msg(QMessageBox.Critical, "配额不足", 
+                           f"文件总大小 ({total_mb:.2f} MB) 超过剩余配额 ({remaining_quota:.2f} MB)。\n请减少文件数量或联系管理员增加配额。")
+            self.add_log("error", f"配额不足，文件总大小: {total_mb:.2f} MB，剩余配额: {remaining_quota:.2f} MB")
+            return
+        
+        use_baidu = self.baidu_api_radio.isChecked()
+        if not self._confirm_baidu_configured(use_baidu):
+            return
+        
+        language_selection, language_code = _LANGS[self.language_combo.currentIndex()]
+        self.add_log("info", f"批量转换{len(paths)}个文件，语言: {language_selection}，使用{'百度' if use_baidu else 'Google'}语音识别API")
+        
+        self._prepare_core()
+        self.worker_signals.status_update.emit("开始处理")
+        
+        # 进度条显示已完成的文件数
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self._pending_progress = None
+        self.result_text.setText(f"正在批量处理{len(paths)}个文件，请稍候...")
+        
+        self._batch = {
+            "paths": paths,
+            "sizes_mb": sizes_mb,
+            "results": [None] * len(paths),
+            "signals": [],
+            "done": 0,
+            "save_to_file": self.save_check.isChecked(),
+        }
+        
+        if self.batch_pool is None:
+            self.batch_pool = QThreadPool(self)
+        max_files = int(self.config.get("max_concurrent_files", BATCH_MAX_CONCURRENT_FILES))
+        self.batch_pool.setMaxThreadCount(max(1, max_files))
+        self.add_log("debug", f"批量转换最多同时处理{max(1, max_files)}个文件")
+        
+        # 每个文件使用单独的信号对象，完成信号绑定文件序号
+        for index, path in enumerate(paths):
+            signals = WorkerSignals()
+            signals.event.connect(self.on_batch_event, Qt.QueuedConnection)
+            signals.finished.connect(functools.partial(self.on_batch_file_finished, index), Qt.QueuedConnection)
+            signals.error.connect(functools.partial(self.on_batch_file_error, index), Qt.QueuedConnection)
+            signals.file_done.connect(self.on_batch_file_done, Qt.QueuedConnection)
+            self._batch["signals"].append(signals)
+            self.batch_pool.start(BatchConversionTask(index, path, language_code, use_baidu,
+                                                      self._batch["save_to_file"],
+                                                      self.task_controller, signals))
+    
+    def on_batch_event(self, event):
+        """批量转换中只显示各文件的日志，进度和状态按文件汇总"""
+        for level, message in event.get('logs', ()):
+            self.add_log(level, message)
+    
+    def on_batch_file_finished(self, index, text, from_cache=False, digest=""):
+        """批量转换中单个文件识别完成：记录结果、扣除配额，需要时保存到同名txt文件"""
+        batch = self._batch
+        path = batch["paths"][index]
+        batch["results"][index] = text
+        
+        # 扣除配额（使用缓存结果时没有调用API，不扣除配额）
+        if not from_cache:
+            size_mb = batch["sizes_mb"][index]
+            self.config["quota_used_mb"] = self.config.get("quota_used_mb", 0) + size_mb
+            try:
+                append_quota_journal(size_mb, digest)
+                self.update_quota_display()
+            except Exception as e:
+                self.add_log("error", f"更新配额失败: {str(e)}")
+        
+        # 批量转换时不逐个弹出保存对话框，结果保存在MP3文件旁边（识别失败的文件不会执行到这里），
+        # 已有同名文件时不覆盖，改用带序号的文件名
+        if batch["save_to_file"] and text:
+            out_path = unused_path(os.path.splitext(path)[0] + ".txt")
+            try:
+                write_text_file(out_path, text)
+                self.add_log("success", f"文件已保存: {out_path}")
+            except Exception as e:
+                self.add_log("error", f"保存文件 {out_path} 时出错: {str(e)}")
+    
+    def on_batch_file_error(self, index, error_message):
+        """批量转换中单个文件转换失败，不影响其他文件"""
+        self._batch["results"][index] = f"转换失败: {error_message}"
+        self.add_log("error", f"{os.path.basename(self._batch['paths'][index])} 转换失败: {error_message}")
+    
+    def on_batch_file_done(self, index):
+        """批量转换中单个文件处理结束，全部结束后按文件顺序汇总结果"""
+        batch = self._batch
+        batch["done"] += 1
+        total = len(batch["paths"])
+        self._pending_progress = (batch["done"], total)
+        self.status_label.setText(f"正在处理... ({batch['done']}/{total})")
+        if batch["done"] < total:
+            return
+        
+        self._batch = None
+        self.result_text.setText("\n\n".join(
+            f"===== {os.path.basename(path)} =====\n{text if text is not None else '（未完成）'}"
+            for path, text in zip(batch["paths"], batch["results"])
+        ))
+        succeeded = sum(1 for text in batch["results"]
+                        if text is not None and not text.startswith("转换失败"))
+        stopped = self.task_controller.is_stop_requested()
+        self.add_log("success", f"批量转换结束，成功{succeeded}个，共{total}个文件")
+        self.worker_signals.status_update.emit("已停止" if stopped else "已完成")
+        if not stopped:
+            self._show_msg(QMessageBox.Information, "批量转换完成",
+                           f"已完成{succeeded}/{total}个文件的识别，结果已显示在文本区域。")
     
     def on_progress(self, current, total):
         """更新进度条和进度信息"""
-        # 确保在UI线程中更新
-        from PyQt5.QtCore import QMetaObject, Qt, Q_ARG
-        
-        # 计算百分比
         if total > 0:
-            percent = int((current / total) * 100)
-            # 更新进度条范围和值
-            self.progress_bar.setRange(0, 100)
-            self.progress_bar.setValue(percent)
+            # 只记录最新进度，由定时器统一刷新进度条
+            self._pending_progress = (current, total)
             
-            # 记录进度日志
+            # 记录进度日志（只记录开始和结束）
             if current == 0:
                 self.add_log("info", f"开始分段处理：共{total}段")
-            elif current < total:
-                self.add_log("info", f"正在处理第{current+1}/{total}段 ({percent}%)")
-            else:
+            elif current == total:
                 self.add_log("success", f"所有{total}段处理完成 (100%)")
     
-    def run_conversion(self, mp3_file, language_code, use_baidu):
-        try:
-            self.worker_signals.log.emit("info", f"开始处理文件: {os.path.basename(mp3_file)}")
-            
-            # 记录开始时间
-            start_time = time.time()
-            self.worker_signals.log.emit("debug", "记录转换开始时间")
-            
-            # 转换为WAV格式
-            self.worker_signals.log.emit("info", "步骤1: 将MP3转换为WAV格式")
-            self.worker_signals.log.emit("debug", f"源文件: {mp3_file}")
-            
-            # 获取MP3文件时长
-            try:
-                import mutagen
-                audio = mutagen.File(mp3_file)
-                if audio:
-                    duration = audio.info.length
-                    self.worker_signals.log.emit("info", f"音频时长: {int(duration//60)}分{int(duration%60)}秒")
-            except Exception as e:
-                self.worker_signals.log.emit("debug", f"获取音频时长失败: {str(e)}")
-            
-            # 检查是否请求停止
-            if self.task_controller.is_stop_requested():
-                self.worker_signals.log.emit("info", "在WAV转换前检测到停止请求")
-                self.worker_signals.status_update.emit("已停止")
-                return
-                
-            # 检查是否暂停
-            self.task_controller.wait_if_paused()
-            if self.task_controller.is_stop_requested():
-                self.worker_signals.log.emit("info", "在WAV转换前暂停后检测到停止请求")
-                self.worker_signals.status_update.emit("已停止")
-                return
-            
-            self.worker_signals.log.emit("debug", "开始调用convert_mp3_to_wav函数")
-            temp_wav = convert_mp3_to_wav(mp3_file)
-            self.worker_signals.log.emit("success", "WAV转换完成")
-            self.worker_signals.log.emit("debug", f"临时WAV文件: {temp_wav}")
-            
-            try:
-                # 检查是否请求停止
-                if self.task_controller.is_stop_requested():
-                    self.worker_signals.log.emit("info", "在语音识别前检测到停止请求")
-                    self.worker_signals.status_update.emit("已停止")
-                    return
-                    
-                # 检查是否暂停
-                self.task_controller.wait_if_paused()
-                if self.task_controller.is_stop_requested():
-                    self.worker_signals.log.emit("info", "在语音识别前暂停后检测到停止请求")
-                    self.worker_signals.status_update.emit("已停止")
-                    return
-                
-                # 转换为文字
-                self.worker_signals.log.emit("info", "步骤2: 开始语音识别")
-                self.worker_signals.log.emit("info", f"使用语言: {language_code}")
-                
-                api_name = "百度API" if use_baidu else "Google API"
-                self.worker_signals.log.emit("debug", f"调用{api_name}识别服务")
-                
-                # 进度回调函数
-                def progress_callback(current, total):
-                    self.worker_signals.progress.emit(current, total)
-                
-                # 使用选择的API进行识别
-                text = transcribe_audio(temp_wav, language_code, use_baidu, progress_callback, self.task_controller)
-                
-                # 检查是否被用户停止
-                if text == "处理已被用户停止":
-                    self.worker_signals.log.emit("info", "处理已被用户停止")
-                    self.worker_signals.status_update.emit("已停止")
-                    return
-                
-                # 记录识别到的文本信息
-                if text:
-                    word_count = len(text.split())
-                    self.worker_signals.log.emit("success", "语音识别成功")
-                    self.worker_signals.log.emit("info", f"识别到约 {word_count} 个单词")
-                else:
-                    self.worker_signals.log.emit("warning", "识别成功，但未检测到文本内容")
-                
-                # 计算处理时间
-                elapsed_time = time.time() - start_time
-                self.worker_signals.log.emit("info", f"总处理时间: {elapsed_time:.2f} 秒")
-                
-                # 如果需要保存到文件
-                if self.save_check.isChecked():
-                    self.worker_signals.log.emit("info", "用户选择保存到文件")
-                
-                # 发送完成信号
-                self.worker_signals.log.emit("success", "转换流程完成")
-                self.worker_signals.status_update.emit("已完成")
-                self.worker_signals.finished.emit(text)
-            
-            finally:
-                # 删除临时文件
-                if os.path.exists(temp_wav):
-                    self.worker_signals.log.emit("debug", f"删除临时WAV文件: {temp_wav}")
-                    os.remove(temp_wav)
-                    self.worker_signals.log.emit("debug", "临时文件清理完成")
+    def apply_pending_progress(self):
+        """将最新的进度刷新到进度条"""
+        if self._pending_progress is None:
+            return
+        current, total = self._pending_progress
+        self._pending_progress = None
         
-        except Exception as e:
-            # 发送错误信号
-            self.worker_signals.log.emit("error", f"转换过程出错: {str(e)}")
-            self.worker_signals.status_update.emit("已停止")
-            self.worker_signals.error.emit(str(e))
+        percent = int((current / total) * 100)
+        if self.progress_bar.maximum() != 100:
+            self.progress_bar.setRange(0, 100)
+        if self.progress_bar.value() != percent:
+            self.progress_bar.setValue(percent)
     
-    def on_conversion_finished(self, text):
-        # 扣除配额
-        if hasattr(self, 'current_file_size_mb'):
+    def on_conversion_finished(self, text, from_cache=False, digest=""):
+        # 扣除配额（使用缓存结果时没有调用API，不扣除配额）
+        if from_cache:
+            self.add_log("info", "结果来自缓存，未扣除配额")
+        elif hasattr(self, 'current_file_size_mb'):
             self.config["quota_used_mb"] = self.config.get("quota_used_mb", 0) + self.current_file_size_mb
             
-            # 保存配置
+            # 只追加一条扣除记录，退出时再合并写入配置文件
             try:
-                with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                    json.dump(self.config, f, indent=4)
+                append_quota_journal(self.current_file_size_mb, digest)
                 
                 # 更新配额显示
                 self.update_quota_display()
                 self.add_log("info", f"已扣除 {self.current_file_size_mb:.2f} MB 配额")
+                if digest:
+                    self.add_log("debug", f"配额扣除记录: {digest[:16]}")
             except Exception as e:
                 self.add_log("error", f"更新配额失败: {str(e)}")
         
@@ -918,31 +1489,28 @@ class MP3ToTextGUI(QMainWindow):
         
         # 显示成功消息
         if not self.task_controller.is_stop_requested():  # 只有在非停止状态下才显示
-            QMessageBox.information(self, "转换完成", "语音识别已完成，结果已显示在文本区域。")
+            self._show_msg(QMessageBox.Information, "转换完成", "语音识别已完成，结果已显示在文本区域。")
         
         # 如果需要保存到文件
         if self.save_check.isChecked():
             self.add_log("info", "准备保存结果到文件")
-            options = QFileDialog.Options()
-            options |= QFileDialog.DontUseNativeDialog
             
+            # 使用系统原生对话框，打开速度比Qt自绘的对话框快
             file_path, _ = QFileDialog.getSaveFileName(
                 self, 
                 "保存文本文件", 
                 os.path.expanduser("~/转换结果.txt"),  # 默认保存位置和文件名
-                "文本文件 (*.txt);;所有文件 (*)",
-                options=options
+                "文本文件 (*.txt);;所有文件 (*)"
             )
             
             if file_path:
                 try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(text)
+                    write_text_file(file_path, text)
                     self.add_log("success", f"文件已保存: {file_path}")
-                    QMessageBox.information(self, "成功", f"文字已保存到: {file_path}")
+                    self._show_msg(QMessageBox.Information, "成功", f"文字已保存到: {file_path}")
                 except Exception as e:
                     self.add_log("error", f"保存文件时出错: {str(e)}")
-                    QMessageBox.critical(self, "错误", f"保存文件失败: {str(e)}")
+                    self._show_msg(QMessageBox.Critical, "错误", f"保存文件失败: {str(e)}")
             else:
                 self.add_log("info", "用户取消了文件保存")
         
@@ -953,11 +1521,12 @@ class MP3ToTextGUI(QMainWindow):
     
     def on_conversion_error(self, error_message):
         # 显示错误
-        QMessageBox.critical(self, "错误", f"转换失败: {error_message}")
+        self._show_msg(QMessageBox.Critical, "错误", f"转换失败: {error_message}")
         self.result_text.setText(f"转换失败: {error_message}")
         self.add_log("error", f"转换失败: {error_message}")
         
         # 恢复按钮状态，停止进度条
+        self._pending_progress = None
         self.progress_bar.setRange(0, 100)
         self.progress_bar.setValue(0)
         self.add_log("info", "界面恢复正常状态")
@@ -969,8 +1538,8 @@ class MP3ToTextGUI(QMainWindow):
         self.add_log("info", f"处理状态: {status}")
         
         if status == "已完成" or status == "已停止":
-            # 重置按钮状态
-            self.convert_button.setEnabled(True)
+            # 重置按钮状态（配额用尽时转换按钮保持禁用）
+            self.convert_button.setEnabled(self.remaining_quota_mb() > 0)
             self.pause_resume_button.setEnabled(False)
             self.stop_button.setEnabled(False)
             self.is_converting = False
@@ -993,6 +1562,15 @@ class MP3ToTextGUI(QMainWindow):
             self.is_paused = False
             self.status_label.setText("正在处理...")
 
+    def closeEvent(self, event):
+        """关闭窗口时停止正在进行的任务，并关闭识别模块保持的HTTP长连接"""
+        if self.task_controller is not None:
+            self.task_controller.stop()
+        core = sys.modules.get('mp3_to_text')
+        if core is not None:
+            core.close_baidu_client()
+        super().closeEvent(event)
+    
     def toggle_pause_resume(self):
         """
         切换暂停/恢复状态
@@ -1005,18 +1583,7 @@ class MP3ToTextGUI(QMainWindow):
             self.task_controller.resume()
             self.is_paused = False
             self.pause_resume_button.setText("暂停")
-            self.pause_resume_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #FFA000;
-                    color: white;
-                    border: none;
-                    padding: 8px 16px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #FF8F00;
-                }
-            """)
+            self._set_pause_button_state("running")
             self.add_log("info", "转换任务已恢复")
             self.status_label.setText("正在处理...")
             self.worker_signals.status_update.emit("已恢复")
@@ -1025,22 +1592,18 @@ class MP3ToTextGUI(QMainWindow):
             self.task_controller.pause()
             self.is_paused = True
             self.pause_resume_button.setText("恢复")
-            self.pause_resume_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #4CAF50;
-                    color: white;
-                    border: none;
-                    padding: 8px 16px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #45a049;
-                }
-            """)
+            self._set_pause_button_state("paused")
             self.add_log("info", "转换任务已暂停")
             self.status_label.setText("已暂停")
             self.worker_signals.status_update.emit("已暂停")
 
+    def _set_pause_button_state(self, state):
+        """切换暂停/恢复按钮的state属性，重新应用已解析的样式"""
+        button = self.pause_resume_button
+        button.setProperty("state", state)
+        button.style().unpolish(button)
+        button.style().polish(button)
+
     def stop_conversion(self):
         """
         停止转换过程
@@ -1066,6 +1629,7 @@ def main():
         QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
         
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(flush_config)
     window = MP3ToTextGUI()
     window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+mp3_to_text识别模块的测试
+"""
+
+from unittest import mock
+
+import pytest
+
+core = pytest.importorskip("mp3_to_text")
+
+
+@pytest.fixture
+def baidu_client(monkeypatch):
+    """配置测试用的百度API密钥，测试结束后关闭共享客户端"""
+    monkeypatch.setattr(core, "BAIDU_APP_ID", "app")
+    monkeypatch.setattr(core, "BAIDU_API_KEY", "key")
+    monkeypatch.setattr(core, "BAIDU_SECRET_KEY", "secret")
+    core.close_baidu_client()
+    client = core._get_baidu_client()
+    yield client
+    core.close_baidu_client()
+
+
+def test_asr_posts_through_pooled_session(baidu_client):
+    """识别请求应通过带连接池和重试的Session发送"""
+    session = baidu_client.s
+    adapter = session.get_adapter("https://vop.baidu.com/server_api")
+    assert adapter.max_retries.total == 2
+    assert baidu_client._AipBase__client is session
+    
+    response = mock.Mock(content=b'{"err_no": 0, "result": ["ok"]}')
+    with mock.patch.object(baidu_client, "_auth", return_value={"access_token": "t"}), \
+            mock.patch.object(session, "post", return_value=response) as post:
+        result = baidu_client.asr(b"\0\0" * 160, "pcm", 16000, {"dev_pid": 1537})
+    assert post.called
+    assert result["result"] == ["ok"]
+
+
+def test_close_baidu_client_closes_request_session(baidu_client):
+    """关闭客户端时应关闭识别请求使用的Session（与token请求的Session相同时只关闭一次）"""
+    with mock.patch.object(baidu_client.s, "close") as close:
+        core.close_baidu_client()
+    close.assert_called_once_with()
+    assert core._BAIDU_CLIENT is None
+
+
+FRAME_MS = 30
+BYTES_PER_MS = 32  # 16kHz、16位单声道
+FRAME_BYTES = FRAME_MS * BYTES_PER_MS
+
+
+def _frames(*runs):
+    """按(是否语音, 毫秒)依次生成逐帧的语音检测结果"""
+    frames = []
+    for voiced, ms in runs:
+        frames.extend([voiced] * (ms // FRAME_MS))
+    return frames
+
+
+def _segments(frames):
+    return core._speech_segments(frames, FRAME_BYTES, BYTES_PER_MS, 5000, 30000, 300, 2000)
+
+
+def test_speech_segments_merge_short_segments():
+    """咔哒声、呼吸声和短句不应成为单独的分段"""
+    frames = _frames((False, 1500), (True, 90), (False, 2400), (True, 8010), (False, 2400),
+                     (True, 90), (False, 2400), (True, 1200), (False, 3000), (True, 9000), (False, 600))
+    segments = _segments(frames)
+    assert len(segments) >= 1
+    for start, end in segments:
+        assert end - start >= 5000 * BYTES_PER_MS
+        assert end - start <= core.BAIDU_MAX_DURATION_MS * BYTES_PER_MS
+
+
+def test_speech_segments_drop_isolated_clicks():
+    """远离其他语音、无法合并的极短分段应丢弃"""
+    frames = _frames((True, 8010), (False, 61000), (True, 90), (False, 61000), (True, 8010))
+    segments = _segments(frames)
+    assert len(segments) == 2
+    for start, end in segments:
+        assert end - start >= 5000 * BYTES_PER_MS
+
+
+def test_speech_segments_keep_only_short_segment():
+    """只有一个分段时即使很短也保留"""
+    assert len(_segments(_frames((False, 900), (True, 90), (False, 900)))) == 1
+
+
+def _tone(seconds, amplitude, np):
+    """生成16kHz的正弦音，模拟指定音量的语音"""
+    t = np.arange(int(seconds * 16000)) / 16000.0
+    return (np.sin(2 * np.pi * 220 * t) * amplitude).astype(np.int16)
+
+
+def test_split_on_energy_keeps_quiet_speech():
+    """没有真正静音的录音中，较轻的语音不应被当作静音切掉"""
+    np = pytest.importorskip("numpy")
+    pcm = np.concatenate([_tone(2, 8000 if i % 2 == 0 else 600, np) for i in range(30)]).tobytes()
+    segments = core.split_on_energy(memoryview(pcm))
+    kept = sum(end - start for start, end in segments)
+    assert kept >= len(pcm) * 0.98
+
+
+def test_split_on_energy_drops_silence():
+    """真正的静音部分应被丢弃"""
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    noise = (rng.standard_normal(10 * 16000) * 20).astype(np.int16)
+    pcm = np.concatenate([_tone(10, 3000, np), noise, _tone(10, 3000, np), noise]).tobytes()
+    segments = core.split_on_energy(memoryview(pcm))
+    kept = sum(end - start for start, end in segments)
+    assert len(pcm) * 0.45 <= kept <= len(pcm) * 0.6
+
+
+def test_large_audio_keeps_partial_transcript(monkeypatch):
+    """部分分段识别失败时返回其余分段的文本，并记录失败的分段序号"""
+    segments = [(0, 3200), (3200, 6400), (6400, 9600)]
+    monkeypatch.setattr(core, "split_on_speech", lambda raw: segments)
+    
+    def recognize(index, chunk, chunks_number, options, task_controller=None):
+        if index == 1:
+            raise core.RecognitionError("百度API错误")
+        return f"第{index + 1}段"
+    
+    monkeypatch.setattr(core, "_recognize_chunk_baidu", recognize)
+    audio = core.AudioSegment.silent(duration=300, frame_rate=16000)
+    failed = []
+    text = core.transcribe_large_audio_baidu(audio, options={}, failed_segments=failed)
+    assert text == "第1段\n第3段"
+    assert failed == [1]
+
+
+def test_large_audio_fails_when_every_segment_fails(monkeypatch):
+    """所有分段都识别失败时抛出RecognitionError"""
+    monkeypatch.setattr(core, "split_on_speech", lambda raw: [(0, 3200), (3200, 6400)])
+    
+    def recognize(index, chunk, chunks_number, options, task_controller=None):
+        raise core.RecognitionError("百度API错误")
+    
+    monkeypatch.setattr(core, "_recognize_chunk_baidu", recognize)
+    audio = core.AudioSegment.silent(duration=200, frame_rate=16000)
+    with pytest.raises(core.RecognitionError):
+        core.transcribe_large_audio_baidu(audio, options={})
@@ -5,21 +5,25 @@
 Tkinter测试程序
 """
 
-import tkinter as tk
-from tkinter import ttk, messagebox
-
-def show_message():
-    messagebox.showinfo("测试", "Tkinter正常工作！")
-
-root = tk.Tk()
-root.title("Tkinter测试")
-root.geometry("300x200")
-
-label = ttk.Label(root, text="这是一个Tkinter测试")
-label.pack(pady=20)
-
-button = ttk.Button(root, text="点击测试", command=show_message)
-button.pack(pady=20)
+def main():
+    # Tk只在直接运行测试时导入，导入本文件（如打包工具扫描依赖时）不会加载Tk
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+    
+    def show_message():
+        messagebox.showinfo("测试", "Tkinter正常工作！")
+    
+    root = tk.Tk()
+    root.title("Tkinter测试")
+    root.geometry("300x200")
+    
+    label = ttk.Label(root, text="这是一个Tkinter测试")
+    label.pack(pady=20)
+    
+    button = ttk.Button(root, text="点击测试", command=show_message)
+    button.pack(pady=20)
+    
+    root.mainloop()
 
 if __name__ == "__main__":
-    root.mainloop() 
\ No newline at end of file
+    main() 
\ No newline at end of file